@@ -0,0 +1,322 @@
+import numpy as np
+
+import engine
+
+# Fixed-point loan amortization.
+#
+# Money is held as int64 paise and every instalment is rounded the way a
+# lender's statement is: the EMI once, to a configurable unit and mode, and
+# each month's interest to the paisa. The last instalment pays whatever is
+# left, so a schedule's rows add up exactly to its totals and every loan
+# ends on a zero balance.
+#
+# Loans are amortized side by side: the month loop runs once for the
+# longest tenure and does array arithmetic across all loans. Part
+# prepayments and rate resets are given as event columns naming the loan
+# (its position in the inputs), the month and the amount or new rate:
+#
+#   amortize(amounts, rates, years,
+#            prepayments={"loan": [0, 7], "month": [24, 60], "amount": [200000, 50000]},
+#            rate_resets={"loan": [3], "month": [13], "rate": [9.25]})
+#
+# A prepayment is paid after that month's instalment. A rate reset applies
+# from that month's interest onward and re-fixes the EMI so the loan still
+# ends by its original tenure, or by the earlier end a prepayment brought
+# in reduce_tenure mode. Interest is computed exactly from the rate
+# in units of 0.0001% a year.
+
+ROUNDING = ("half_even", "half_up", "floor", "ceiling")
+PREPAYMENT_MODES = ("reduce_tenure", "reduce_emi")
+RATE_SCALE = 10000  # rate units per 1% a year
+_INTEREST_DIVISOR = 12 * 100 * RATE_SCALE  # paise x rate units -> paise a month
+BLOCK_SIZE = 4096
+# Largest intermediate the month loop may form (a balance in paise times a
+# rate in units); half of int64's range, so sums of two still fit
+_MAX_PRODUCT = 2**62
+COLUMNS = ("scenario", "month", "payment", "prepayment", "interest", "principal", "balance")
+
+
+def paise_columns(columns):
+    # The same columns with the money ones suffixed _paise, for outputs
+    # that sit next to figures in rupees
+    return {name if name in ("scenario", "month") else f"{name}_paise": column for name, column in columns.items()}
+
+
+def to_paise(rupees):
+    paise = np.rint(np.asarray(rupees, dtype=np.float64) * 100)
+    if not np.isfinite(paise).all() or (np.abs(paise) >= _MAX_PRODUCT).any():
+        raise ValueError("amounts must be finite and small enough to count in int64 paise")
+    return paise.astype(np.int64)
+
+
+def _check(mode, modes):
+    if mode not in modes:
+        raise ValueError(f"unknown mode {mode!r}; expected one of {', '.join(modes)}")
+
+
+def _check_options(interest_rounding, emi_rounding, emi_unit, prepayment_mode):
+    _check(interest_rounding, ROUNDING)
+    _check(emi_rounding, ROUNDING)
+    _check(prepayment_mode, PREPAYMENT_MODES)
+    if isinstance(emi_unit, bool) or not isinstance(emi_unit, (int, np.integer)) or emi_unit < 1:
+        raise ValueError(f"emi_unit must be a positive whole number of paise, not {emi_unit!r}")
+
+
+def _divide(numerator, denominator, mode):
+    # numerator / denominator rounded to an integer, exactly
+    quotient, remainder = np.divmod(numerator, denominator)
+    if mode == "floor":
+        return quotient
+    if mode == "ceiling":
+        return quotient + (remainder > 0)
+    if mode == "half_up":
+        return quotient + (2 * remainder >= denominator)
+    return quotient + ((2 * remainder > denominator) | ((2 * remainder == denominator) & (quotient % 2 == 1)))
+
+
+def _round_float(values, mode):
+    if mode == "floor":
+        return np.floor(values)
+    if mode == "ceiling":
+        return np.ceil(values)
+    if mode == "half_up":
+        return np.floor(values + 0.5)
+    return np.rint(values)
+
+
+def _emi(balance, rate, months, mode, unit):
+    # Level instalment in paise that repays `balance` paise over `months`,
+    # rounded to a multiple of `unit` paise. Evaluated in rupees with the
+    # engine's formula, so the default settings reproduce engine.emi.
+    amount = balance / 100
+    monthly_rate = engine._monthly_rate(rate)
+    months = np.maximum(months, 1)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = engine._power(1 + monthly_rate, months.astype(np.float64))
+        payment = (amount * monthly_rate * growth) / (growth - 1)
+    payment = np.where(monthly_rate == 0, amount / months, payment)
+    return _round_float(payment * (100 / unit), mode).astype(np.int64) * unit
+
+
+def _term(balance, rate, emi):
+    # Whole months a level `emi` takes to repay `balance` (both in paise) at
+    # `rate` % a year; inf where the EMI doesn't cover the interest
+    monthly_rate = engine._monthly_rate(rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        months = -np.log1p(-balance * monthly_rate / emi) / np.log1p(monthly_rate)
+    months = np.where(monthly_rate == 0, balance / emi, months)
+    return np.ceil(np.where(np.isnan(months), np.inf, months) - 1e-9)
+
+
+def _events(events, column, loans):
+    # Event columns sorted by month, as (month, loan, value) arrays
+    if events is None:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+    try:
+        month = np.asarray(events["month"], dtype=np.int64)
+        loan = np.asarray(events["loan"], dtype=np.int64)
+        value = np.asarray(events[column], dtype=np.float64)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"events need equal-length loan, month and {column} lists of numbers")
+    if not month.shape == loan.shape == value.shape or month.ndim != 1:
+        raise ValueError(f"events need equal-length loan, month and {column} lists of numbers")
+    if loan.size and (loan.min() < 0 or loan.max() >= loans):
+        raise ValueError("event refers to a loan that is not in the inputs")
+    if month.size and month.min() < 1:
+        raise ValueError("event months start at 1")
+    if not np.isfinite(value).all() or (value < 0).any():
+        raise ValueError(f"event {column}s must be finite and not negative")
+    order = np.argsort(month, kind="stable")
+    return month[order], loan[order], value[order]
+
+
+def amortize(loan_amount, rate, time, prepayments=None, rate_resets=None,
+             interest_rounding="half_even", emi_rounding="half_even", emi_unit=100,
+             prepayment_mode="reduce_tenure"):
+    # Month-by-month schedule in the long format of schedules.py, one row
+    # per (loan, month) while the loan is outstanding. Money columns are
+    # int64 paise: payment is the instalment (EMI, or the adjusted last
+    # one), prepayment is paid on top of it, and balance is the closing
+    # balance. Loans are amortized over `time` years at `rate` % a year.
+    #
+    # emi_rounding and emi_unit (in paise) fix the EMI; the default is
+    # whole rupees rounded half to even, the EMI the calculator shows.
+    # prepayment_mode "reduce_tenure" keeps the EMI and ends the loan
+    # early, "reduce_emi" re-fixes the EMI over the remaining months.
+    _check_options(interest_rounding, emi_rounding, emi_unit, prepayment_mode)
+
+    loan_amount, rate, time = [value.ravel() for value in engine._broadcast(loan_amount, rate, time)]
+    loans = loan_amount.size
+    prepayments = _events(prepayments, "amount", loans)
+    rate_resets = _events(rate_resets, "rate", loans)
+    options = (interest_rounding, emi_rounding, emi_unit, prepayment_mode)
+
+    # Blocks of loans small enough for their rows to stay in cache while
+    # they are laid out in (loan, month) order
+    blocks = []
+    for start in range(0, loans, BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, loans)
+        block = _amortize_block(
+            loan_amount[start:stop], rate[start:stop], time[start:stop],
+            _block_events(prepayments, start, stop), _block_events(rate_resets, start, stop), *options
+        )
+        block["scenario"] += start
+        blocks.append(block)
+    if not blocks:
+        return {name: np.empty(0, dtype=np.int64) for name in COLUMNS}
+    return {name: np.concatenate([block[name] for block in blocks]) for name in COLUMNS}
+
+
+def _block_events(events, start, stop):
+    month, loan, value = events
+    inside = (loan >= start) & (loan < stop)
+    return month[inside], loan[inside] - start, value[inside]
+
+
+def _months(loan_amount, rate, time, prepayments, rate_resets,
+            interest_rounding, emi_rounding, emi_unit, prepayment_mode):
+    # The month loop: yields (active loans, month, payment, prepayment,
+    # interest, closing balance) for every month any loan is outstanding
+    loans = loan_amount.size
+    balance = to_paise(loan_amount)
+    rate = rate.copy()
+    rate_units = np.rint(rate * RATE_SCALE).astype(np.int64)
+    tenure = np.rint(time * 12).astype(np.int64)
+    emi = _emi(balance, rate, tenure, emi_rounding, emi_unit)
+
+    prepay_month, prepay_loan, prepay_amount = prepayments
+    prepay_amount = to_paise(prepay_amount)
+    reset_month, reset_loan, reset_rate = rate_resets
+
+    if not (np.isfinite(rate).all() and np.isfinite(time).all()) or (rate < 0).any():
+        raise ValueError("rates and tenures must be finite and rates not negative")
+    # Interest is balance x rate units; the balance never exceeds the loan
+    top_rate = np.rint(max(rate.max(initial=0), reset_rate.max(initial=0)) * RATE_SCALE)
+    if int(balance.max(initial=0)) * int(top_rate) >= _MAX_PRODUCT:
+        raise ValueError("loan amount and rate are too large to amortize in int64 paise")
+
+    for month in range(1, int(tenure.max(initial=0)) + 1):
+        active = np.flatnonzero(balance > 0)
+        if active.size == 0:
+            break
+
+        lo, hi = np.searchsorted(reset_month, [month, month + 1])
+        if hi > lo:
+            reset = reset_loan[lo:hi]
+            remaining = tenure[reset] - month + 1
+            if prepayment_mode == "reduce_tenure":
+                # Keep the term the current EMI implies, so a reset doesn't
+                # undo the shorter tenure of an earlier prepayment
+                remaining = np.minimum(remaining, np.maximum(_term(balance[reset], rate[reset], emi[reset]), 1)).astype(np.int64)
+            rate[reset] = reset_rate[lo:hi]
+            rate_units[reset] = np.rint(reset_rate[lo:hi] * RATE_SCALE).astype(np.int64)
+            emi[reset] = _emi(balance[reset], rate[reset], remaining, emi_rounding, emi_unit)
+
+        opening = balance[active]
+        interest = _divide(opening * rate_units[active], _INTEREST_DIVISOR, interest_rounding)
+        due = opening + interest
+        # Last instalment: pay off what is left at the end of the tenure, or
+        # as soon as one EMI covers it
+        payment = np.where((month >= tenure[active]) | (emi[active] >= due), due, emi[active])
+        closing = due - payment
+
+        prepayment = np.zeros(loans, dtype=np.int64)
+        lo, hi = np.searchsorted(prepay_month, [month, month + 1])
+        np.add.at(prepayment, prepay_loan[lo:hi], prepay_amount[lo:hi])
+        prepayment = np.minimum(prepayment[active], closing)
+        closing = closing - prepayment
+
+        balance[active] = closing
+        if prepayment_mode == "reduce_emi" and hi > lo:
+            prepaid = active[prepayment > 0]
+            emi[prepaid] = _emi(balance[prepaid], rate[prepaid], tenure[prepaid] - month, emi_rounding, emi_unit)
+
+        yield active, month, payment, prepayment, interest, closing
+
+
+def _amortize_block(loan_amount, rate, time, prepayments, rate_resets, *options):
+    loans = loan_amount.size
+    rows = list(_months(loan_amount, rate, time, prepayments, rate_resets, *options))
+
+    # A loan is outstanding for an unbroken run of months from month 1, so
+    # each row's position in (loan, month) order is known without sorting
+    months_paid = np.zeros(loans, dtype=np.int64)
+    for active, *_ in rows:
+        months_paid[active] += 1
+    starts = np.cumsum(months_paid) - months_paid
+    schedule = {name: np.empty(months_paid.sum(), dtype=np.int64) for name in COLUMNS}
+    for active, month, payment, prepayment, interest, closing in rows:
+        position = starts[active] + month - 1
+        schedule["scenario"][position] = active
+        schedule["month"][position] = month
+        schedule["payment"][position] = payment
+        schedule["prepayment"][position] = prepayment
+        schedule["interest"][position] = interest
+        schedule["principal"][position] = payment - interest
+        schedule["balance"][position] = closing
+    return schedule
+
+
+def summarize(schedule, loans=None):
+    # Per-loan totals of a schedule, in paise: the first instalment (emi),
+    # total_payment (instalments and prepayments), total_prepayment,
+    # total_interest and the number of months paid.
+    scenario = schedule["scenario"]
+    if loans is None:
+        loans = int(scenario.max()) + 1 if scenario.size else 0
+    months = np.bincount(scenario, minlength=loans)
+    starts = np.cumsum(months) - months
+    paid = months > 0
+
+    def total(column):
+        sums = np.zeros(loans, dtype=np.int64)
+        sums[paid] = np.add.reduceat(column, starts[paid]) if scenario.size else 0
+        return sums
+
+    emi = np.zeros(loans, dtype=np.int64)
+    emi[paid] = schedule["payment"][starts[paid]]
+    prepayment = total(schedule["prepayment"])
+    return {
+        "emi": emi,
+        "total_payment": total(schedule["payment"]) + prepayment,
+        "total_prepayment": prepayment,
+        "total_interest": total(schedule["interest"]),
+        "months": months,
+    }
+
+
+def totals(loan_amount, rate, time, prepayments=None, rate_resets=None,
+           interest_rounding="half_even", emi_rounding="half_even", emi_unit=100,
+           prepayment_mode="reduce_tenure"):
+    # summarize(amortize(...)) with the same arguments, without building the
+    # schedule: one entry per loan, so a loan book's totals take memory in
+    # the number of loans rather than loans x months.
+    _check_options(interest_rounding, emi_rounding, emi_unit, prepayment_mode)
+
+    loan_amount, rate, time = [value.ravel() for value in engine._broadcast(loan_amount, rate, time)]
+    loans = loan_amount.size
+    result = {name: np.zeros(loans, dtype=np.int64) for name in ("emi", "total_payment", "total_prepayment", "total_interest", "months")}
+    months = _months(
+        loan_amount, rate, time, _events(prepayments, "amount", loans), _events(rate_resets, "rate", loans),
+        interest_rounding, emi_rounding, emi_unit, prepayment_mode,
+    )
+    for active, month, payment, prepayment, interest, closing in months:
+        if month == 1:
+            result["emi"][active] = payment
+        result["total_payment"][active] += payment + prepayment
+        result["total_prepayment"][active] += prepayment
+        result["total_interest"][active] += interest
+        result["months"][active] += 1
+    return result
+
+
+def emi(loan_amount, rate, time):
+    # engine.emi with totals that match the schedule: the EMI, total
+    # payment and total interest of amortize() in paise, and the months paid
+    result = totals(loan_amount, rate, time)
+    return {
+        "emi_paise": result["emi"],
+        "total_payment_paise": result["total_payment"],
+        "total_interest_paise": result["total_interest"],
+        "months": result["months"],
+    }
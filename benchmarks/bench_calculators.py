@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+from streamlit import dataframe_util
+
+import amortization
+import engine
+import exports
+import main as app
+import surface
+
+# Headless regression benchmark of every calculator.
+#
+# Each calculator is run at its smallest, default and worst-case input
+# settings through the same stages as a Calculate click: compute (engine,
+# or for EMI the paise amortization the app runs),
+# chart (Vega-Lite spec serialization), table (DataFrame build), display
+# (the Arrow serialization st.dataframe performs) and one export per
+# format. The engine is then timed on batches of random slider scenarios
+# up to --max-batch rows. Every metric is the best of --repeat runs.
+#
+#   python -m benchmarks.bench_calculators --save      # record a baseline
+#   python -m benchmarks.bench_calculators             # compare against it
+#
+# A metric regresses when it is more than --tolerance slower than the
+# baseline and by at least NOISE_FLOOR seconds; the run then exits with
+# status 1. Baselines are machine-specific, so record one on the machine
+# that will do the comparing.
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+NOISE_FLOOR = 0.002
+BATCH_SIZES = (1000, 10000, 100000, 1000000)
+
+SETTINGS = {
+    "sip": {
+        "small": {"principal": 500, "rate": 1.0, "time": 1},
+        "typical": {"principal": 1000, "rate": 6.0, "time": 10},
+        "worst": {"principal": 50000, "rate": 15.0, "time": 30},
+    },
+    "stepup_sip": {
+        "small": {"principal": 500, "increment": 0, "rate": 1.0, "time": 1},
+        "typical": {"principal": 1000, "increment": 500, "rate": 6.0, "time": 10},
+        "worst": {"principal": 50000, "increment": 10000, "rate": 15.0, "time": 30},
+    },
+    "swp": {
+        "small": {"principal": 10000, "rate": 1.0, "time": 1, "monthly_withdrawal": 500},
+        "typical": {"principal": 100000, "rate": 6.0, "time": 5, "monthly_withdrawal": 5000},
+        "worst": {"principal": 5000000, "rate": 15.0, "time": 30, "monthly_withdrawal": 50000},
+    },
+    "goal_based_sip": {
+        "small": {"goal_amount": 10000, "rate": 1.0, "time": 1},
+        "typical": {"goal_amount": 500000, "rate": 6.0, "time": 10},
+        "worst": {"goal_amount": 10000000, "rate": 15.0, "time": 30},
+    },
+    "fd": {
+        "small": {"principal": 10000, "rate": 1.0, "time": 1},
+        "typical": {"principal": 100000, "rate": 6.0, "time": 5},
+        "worst": {"principal": 5000000, "rate": 15.0, "time": 10},
+    },
+    # The EMI inputs are unbounded number fields; 50 years is the longest
+    # tenure we expect anyone to enter
+    "emi": {
+        "small": {"loan_amount": 10000, "rate": 0.1, "time": 1},
+        "typical": {"loan_amount": 500000, "rate": 8.0, "time": 10},
+        "worst": {"loan_amount": 100000000, "rate": 30.0, "time": 50},
+    },
+}
+
+def emi_compute(loan_amount, rate, time):
+    # What the EMI page computes: the paise schedule and its totals
+    schedule = amortization.amortize(loan_amount, rate, time)
+    return dict(engine.as_scalars(amortization.summarize(schedule)), schedule=schedule)
+
+
+# Compute stage of each calculator, as run by the app
+COMPUTE = {name: lambda inputs, function=function: engine.as_scalars(function(**inputs)) for name, function in engine.CALCULATORS.items()}
+COMPUTE["emi"] = lambda inputs: emi_compute(**inputs)
+# Batch pricing of each calculator; EMI loan books are priced with the
+# reconciled totals that bulk.py and the API return
+BATCH = dict(engine.CALCULATORS, emi=amortization.totals)
+
+# Pie chart slices and detail table of each calculator, as drawn by the app
+CHARTS = {
+    "sip": lambda inputs, result: [result["investment"], result["earnings"]],
+    "stepup_sip": lambda inputs, result: [result["investment"], result["earnings"]],
+    "swp": lambda inputs, result: [inputs["principal"], result["earnings"]],
+    "goal_based_sip": lambda inputs, result: [inputs["goal_amount"], result["investment"]],
+    "fd": lambda inputs, result: [inputs["principal"], result["earnings"]],
+    "emi": lambda inputs, result: [inputs["loan_amount"], result["total_interest"] / 100],
+}
+TABLES = {
+    "sip": lambda inputs, result: app.sip_table(**inputs),
+    "stepup_sip": lambda inputs, result: app.stepup_sip_table(**inputs),
+    "swp": lambda inputs, result: app.swp_table(**inputs),
+    "fd": lambda inputs, result: app.fd_table(inputs["principal"], result["maturity"], result["earnings"]),
+    "emi": lambda inputs, result: app.emi_table(result["schedule"]),
+}
+
+# Slider ranges for the batch scenarios; EMI gets a plausible loan book
+BATCH_GRIDS = dict(surface.GRIDS)
+BATCH_GRIDS["stepup_sip"] = {"principal": (500, 50000, 500), "increment": (0, 10000, 100), "rate": surface.RATE, "time": (1, 30, 1)}
+BATCH_GRIDS["emi"] = {"loan_amount": (10000, 10000000, 5000), "rate": (0.1, 20.0, 0.1), "time": (1, 30, 1)}
+
+
+def best_of(function, repeat):
+    # One untimed call first, so lazy imports and first-use setup are not
+    # counted against whichever metric happens to run first
+    value = function()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = function()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def stage_metrics(repeat):
+    metrics = {}
+    for calculator, settings in SETTINGS.items():
+        for setting, inputs in settings.items():
+            prefix = f"{calculator}/{setting}"
+            metrics[prefix + "/compute"], result = best_of(lambda: COMPUTE[calculator](inputs), repeat)
+            sizes = CHARTS[calculator](inputs, result)
+            metrics[prefix + "/chart"], _ = best_of(
+                lambda: json.dumps(app.pie_chart(sizes, ["a", "b"], ["#4CAF50", "#FFC107"])), repeat
+            )
+            if calculator not in TABLES:
+                continue
+            metrics[prefix + "/table"], df = best_of(lambda: TABLES[calculator](inputs, result), repeat)
+            metrics[prefix + "/display"], _ = best_of(lambda: dataframe_util.convert_pandas_df_to_arrow_bytes(df), repeat)
+            for fmt in exports.FORMATS:
+                metrics[f"{prefix}/export:{fmt}"], _ = best_of(lambda: exports.to_bytes([("Data", df)], fmt), repeat)
+    return metrics
+
+
+def batch_inputs(calculator, size, rng):
+    inputs = {}
+    for name, (start, stop, step) in BATCH_GRIDS[calculator].items():
+        inputs[name] = rng.choice(surface.axis_values(start, stop, step), size)
+    if calculator == "swp":
+        inputs["monthly_withdrawal"] = rng.choice(surface.axis_values(500, 50000, 500), size)
+    return inputs
+
+
+def batch_metrics(max_batch, repeat):
+    metrics = {}
+    rng = np.random.default_rng(0)
+    for calculator, function in BATCH.items():
+        for size in BATCH_SIZES:
+            if size > max_batch:
+                break
+            inputs = batch_inputs(calculator, size, rng)
+            metrics[f"batch/{calculator}/{size}"], _ = best_of(lambda: function(**inputs), repeat)
+    return metrics
+
+
+def compare(metrics, baseline, tolerance):
+    regressions = []
+    print(f"{'metric':<36}{'baseline (ms)':>14}{'current (ms)':>14}{'change':>9}")
+    for name, seconds in metrics.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<36}{'-':>14}{seconds * 1000:>14.3f}{'new':>9}")
+            continue
+        change = seconds / before - 1 if before else 0.0
+        regressed = change > tolerance and seconds - before >= NOISE_FLOOR
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<36}{before * 1000:>14.3f}{seconds * 1000:>14.3f}{change:>+9.0%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every calculator and compare against a saved baseline")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help=f"baseline file (default: {DEFAULT_BASELINE})")
+    parser.add_argument("--save", action="store_true", help="write this run as the new baseline instead of comparing")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-batch", type=int, default=BATCH_SIZES[-1])
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a metric regresses (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    metrics = stage_metrics(args.repeat)
+    metrics.update(batch_metrics(args.max_batch, args.repeat))
+
+    if args.save:
+        with open(args.baseline, "w") as handle:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "numpy": np.__version__,
+                "metrics": metrics,
+            }, handle, indent=2)
+        print(f"saved {len(metrics)} metrics to {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)["metrics"]
+    else:
+        print(f"no baseline at {args.baseline}; run with --save to record one", file=sys.stderr)
+
+    regressions = compare(metrics, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import argparse
+import time
+import tracemalloc
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import amortization
+import exports
+import schedules
+
+# Export latency and peak memory: the eager openpyxl workbook the UI used
+# to build on every Calculate click, against the streaming writers.
+#
+#   python -m benchmarks.bench_exports [--loans 300] [--repeat 3]
+#
+# Peak memory is measured with tracemalloc, which sees the Python heap and
+# NumPy buffers but not Arrow's allocator, so Parquet peaks read low.
+
+
+def emi_frame(schedule):
+    # The app's EMI table columns, from an amortization.py schedule in paise
+    return pd.DataFrame({
+        "Loan": schedule["scenario"] + 1,
+        "Month": schedule["month"],
+        "Principal Paid (₹)": schedule["principal"] / 100,
+        "Interest Paid (₹)": schedule["interest"] / 100,
+        "Outstanding Principal (₹)": schedule["balance"] / 100,
+    })
+
+
+def single_loan_chunks():
+    yield "EMI Schedule", emi_frame(amortization.amortize(500000, 8.0, 30))
+
+
+def loan_book_chunks(loans):
+    amounts = np.linspace(100000, 5000000, loans).round()
+    for schedule in schedules.iter_schedules(amortization.amortize, chunk_size=100, loan_amount=amounts, rate=8.0, time=30):
+        yield "EMI Schedules", emi_frame(schedule)
+
+
+def eager_openpyxl(chunks):
+    # Previous path: materialise every chunk, then build the whole workbook
+    frames = {}
+    for sheet_name, df in chunks:
+        frames.setdefault(sheet_name, []).append(df)
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for sheet_name, dfs in frames.items():
+            pd.concat(dfs).to_excel(writer, index=False, sheet_name=sheet_name)
+    return buffer.getvalue()
+
+
+def measure(export, make_chunks, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        export(make_chunks())
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    size = len(export(make_chunks()))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark table exports")
+    parser.add_argument("--loans", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = {
+        "openpyxl (eager)": eager_openpyxl,
+        "xlsx (streaming)": lambda chunks: exports.to_bytes(chunks, "xlsx"),
+        "csv": lambda chunks: exports.to_bytes(chunks, "csv"),
+        "parquet": lambda chunks: exports.to_bytes(chunks, "parquet"),
+    }
+    cases = {
+        "1 loan x 360 months": single_loan_chunks,
+        f"{args.loans:,} loans x 360 months": lambda: loan_book_chunks(args.loans),
+    }
+
+    print(f"{'case':<28}{'path':<20}{'latency (s)':>12}{'peak (MiB)':>12}{'size (KiB)':>12}")
+    for case, make_chunks in cases.items():
+        for path, export in paths.items():
+            latency, peak, size = measure(export, make_chunks, args.repeat)
+            print(f"{case:<28}{path:<20}{latency:>12.3f}{peak / 2**20:>12.1f}{size / 2**10:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+import surface
+
+# Load test of the JSON API (service.py).
+#
+# Starts the service on a free local port (or targets --url), then sends
+# --requests POSTs over --concurrency keep-alive connections spread across
+# --clients client processes, and reports throughput and latency
+# percentiles. Requests are drawn from --unique distinct scenarios, so the
+# share of cache hits and coalesced requests can be dialled from all-hits
+# (--unique 1) to mostly-misses.
+#
+#   python -m benchmarks.bench_service --endpoint single --requests 50000 --unique 1000
+#   python -m benchmarks.bench_service --endpoint batch --batch-size 10000 --requests 200
+#   python -m benchmarks.bench_service --url http://127.0.0.1:8000 --endpoint schedule --calculator emi
+#
+# EMI requests run the amortization month loop, so apart from the shortest
+# loans they go to the worker pool even as single requests; mostly-miss
+# EMI traffic shows the pool's throughput:
+#
+#   python -m benchmarks.bench_service --endpoint single --calculator emi --requests 5000 --unique 5000
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Input ranges of the generated scenarios, from the UI sliders
+INPUT_GRIDS = dict(surface.GRIDS)
+INPUT_GRIDS["swp"] = dict(surface.GRIDS["swp"], monthly_withdrawal=(500, 50000, 500))
+INPUT_GRIDS["stepup_sip"] = {"principal": (500, 50000, 500), "increment": (0, 10000, 100), "rate": surface.RATE, "time": (1, 30, 1)}
+INPUT_GRIDS["emi"] = {"loan_amount": (10000, 10000000, 5000), "rate": (0.1, 20.0, 0.1), "time": (1, 30, 1)}
+
+
+def scenarios(calculator, count, rng):
+    return {
+        name: rng.choice(surface.axis_values(*bounds), count).tolist()
+        for name, bounds in INPUT_GRIDS[calculator].items()
+    }
+
+
+def request_bodies(endpoint, calculator, unique, batch_size, seed):
+    rng = np.random.default_rng(seed)
+    if endpoint == "batch":
+        return [json.dumps(scenarios(calculator, batch_size, rng)).encode() for _ in range(unique)]
+    columns = scenarios(calculator, unique, rng)
+    return [json.dumps({name: values[i] for name, values in columns.items()}).encode() for i in range(unique)]
+
+
+async def _connection(host, port, path, bodies, latencies, failures):
+    reader, writer = await asyncio.open_connection(host, port)
+    head = f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            writer.write(f"{head}Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                failures.append(status)
+    finally:
+        writer.close()
+
+
+def run_client(host, port, path, bodies, connections):
+    # One client process: `connections` keep-alive connections sharing the
+    # bodies round-robin. Returns latencies, failed statuses and elapsed time.
+    latencies, failures = [], []
+
+    async def run():
+        await asyncio.gather(*[
+            _connection(host, port, path, bodies[i::connections], latencies, failures)
+            for i in range(connections)
+        ])
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    return latencies, failures, time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def health(url):
+    with urllib.request.urlopen(url + "/health", timeout=5) as response:
+        return json.loads(response.read())
+
+
+def start_service(port, processes, workers):
+    command = [sys.executable, "service.py", "--port", str(port), "--processes", str(processes)]
+    if workers:
+        command += ["--workers", str(workers)]
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            health(f"http://127.0.0.1:{port}")
+            return server
+        except OSError:
+            time.sleep(0.1)
+    stop_service(server)
+    raise SystemExit("service did not start within 30s")
+
+
+def stop_service(server):
+    os.killpg(server.pid, signal.SIGINT)
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the calculator JSON API")
+    parser.add_argument("--url", default=None, help="running service to target (default: start one)")
+    parser.add_argument("--endpoint", choices=["single", "batch", "schedule"], default="single")
+    parser.add_argument("--calculator", default="sip")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--unique", type=int, default=1000, help="distinct request bodies (default: 1000)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="scenarios per batch request")
+    parser.add_argument("--concurrency", type=int, default=64, help="open connections in total")
+    parser.add_argument("--clients", type=int, default=2, help="client processes")
+    parser.add_argument("--server-processes", type=int, default=1, help="server processes when starting the service")
+    parser.add_argument("--workers", type=int, default=None, help="service worker processes when starting the service")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    path = f"/v1/{args.calculator}" + ("" if args.endpoint == "single" else f"/{args.endpoint}")
+    unique = request_bodies(args.endpoint, args.calculator, args.unique, args.batch_size, args.seed)
+    order = np.random.default_rng(args.seed + 1).integers(0, len(unique), args.requests)
+    bodies = [unique[i] for i in order]
+
+    server = None
+    if args.url:
+        url = args.url.rstrip("/")
+    else:
+        port = free_port()
+        server = start_service(port, args.server_processes, args.workers)
+        url = f"http://127.0.0.1:{port}"
+    host, port = url.split("//", 1)[1].split(":")
+
+    try:
+        connections = max(1, args.concurrency // args.clients)
+        with multiprocessing.Pool(args.clients) as pool:
+            runs = pool.starmap(run_client, [
+                (host, int(port), path, bodies[i::args.clients], connections) for i in range(args.clients)
+            ])
+        stats = health(url)
+    finally:
+        if server is not None:
+            stop_service(server)
+
+    latencies = np.concatenate([run[0] for run in runs]) * 1000
+    failures = [status for run in runs for status in run[1]]
+    elapsed = max(run[2] for run in runs)
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    print(f"{path}: {len(latencies):,} requests, {len(unique):,} distinct, "
+          f"{args.clients} clients x {connections} connections")
+    print(f"  throughput  {len(latencies) / elapsed:10,.0f} req/s")
+    print(f"  latency     p50 {p50:.2f} ms   p90 {p90:.2f} ms   p99 {p99:.2f} ms   max {latencies.max():.2f} ms")
+    print(f"  errors      {len(failures):,}" + (f" (statuses: {sorted(set(failures))})" if failures else ""))
+    print(f"  server      {stats['cache_hits']:,} cache hits, {stats['coalesced']:,} coalesced, "
+          f"{stats['cache_misses']:,} computed (one process' view when it runs several)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Cold-start and rerun timing of the Streamlit app.
+#
+# Each measurement runs in a fresh interpreter: the script is executed once
+# through Streamlit's AppTest harness (first paint of the sidebar), then
+# the SIP calculator is opened and Calculate is clicked a few times. The
+# report lists which heavy libraries the first paint imported.
+#
+#   python -m benchmarks.bench_startup [--baseline <git revision>]
+#
+# --baseline checks out main.py (and the modules it imports) from another
+# revision into a temporary directory and reports it alongside.
+
+HEAVY = ("numpy", "pandas", "matplotlib", "openpyxl", "xlsxwriter", "pyarrow", "altair")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+heavy = {heavy!r}
+at = AppTest.from_file({script!r}, default_timeout=120)
+start = time.perf_counter()
+at.run()
+first_paint = time.perf_counter() - start
+loaded = [name for name in heavy if name in sys.modules]
+
+start = time.perf_counter()
+at.sidebar.radio[0].set_value("SIP Calculator").run()
+open_page = time.perf_counter() - start
+
+clicks = []
+for _ in range({clicks}):
+    start = time.perf_counter()
+    at.button[0].click().run()
+    clicks.append(time.perf_counter() - start)
+assert not at.exception, at.exception
+
+print(json.dumps({{
+    "first_paint": first_paint,
+    "first_paint_imports": loaded,
+    "open_page": open_page,
+    "first_click": clicks[0],
+    "repeat_click": min(clicks[1:]) if len(clicks) > 1 else clicks[0],
+}}))
+"""
+
+
+def probe(directory, clicks):
+    script = os.path.join(directory, "main.py")
+    code = PROBE.format(heavy=HEAVY, script=script, clicks=clicks)
+    env = dict(os.environ, PYTHONPATH=directory)
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=directory, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def checkout(revision, directory):
+    files = subprocess.run(
+        ["git", "ls-tree", "--name-only", revision], cwd=ROOT,
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    for name in files:
+        if name.endswith(".py"):
+            content = subprocess.run(["git", "show", f"{revision}:{name}"], cwd=ROOT, capture_output=True, check=True).stdout
+            with open(os.path.join(directory, name), "wb") as handle:
+                handle.write(content)
+
+
+def report(label, timings):
+    print(f"{label}:")
+    print(f"  first paint       {timings['first_paint'] * 1000:8.0f} ms")
+    print(f"  open SIP page     {timings['open_page'] * 1000:8.0f} ms")
+    print(f"  first Calculate   {timings['first_click'] * 1000:8.0f} ms")
+    print(f"  repeat Calculate  {timings['repeat_click'] * 1000:8.0f} ms")
+    print(f"  imported at first paint: {', '.join(timings['first_paint_imports']) or 'none of ' + ', '.join(HEAVY)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time app cold start and reruns")
+    parser.add_argument("--baseline", help="git revision to compare against")
+    parser.add_argument("--clicks", type=int, default=5, help="Calculate clicks to time (default: 5)")
+    args = parser.parse_args()
+
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as directory:
+            checkout(args.baseline, directory)
+            report(f"baseline ({args.baseline})", probe(directory, args.clicks))
+    report("working tree", probe(ROOT, args.clicks))
+
+
+if __name__ == "__main__":
+    main()
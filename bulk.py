@@ -0,0 +1,274 @@
+import argparse
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+import amortization
+import engine
+import exports
+import schedules
+
+# Headless bulk scenario runner.
+#
+# Reads a CSV or Parquet file with one row per client plan. The
+# "calculator" column names the engine function (sip, stepup_sip, swp,
+# goal_based_sip, fd, emi) and the other columns carry its inputs under the
+# engine's parameter names (principal, rate, time, increment,
+# monthly_withdrawal, goal_amount, loan_amount). EMI results and schedules
+# come from amortization.py, so their money columns are paise and their
+# totals reconcile with the schedule rows.
+#
+# The input is read in chunks and each chunk is priced in a worker process.
+# Every finished chunk is written as its own part file, so the output
+# directory is a CSV/Parquet dataset and a rerun with the same arguments
+# skips chunks that already have a part file.
+#
+#   python bulk.py scenarios.parquet out/ --workers 8 --schedules
+
+MANIFEST = "_manifest.json"
+
+
+def _emi_schedule(loan_amount, rate, time):
+    return amortization.paise_columns(amortization.amortize(loan_amount, rate, time))
+
+
+CALCULATORS = dict(engine.CALCULATORS, emi=amortization.emi)
+SCHEDULES = dict(schedules.SCHEDULES, emi=_emi_schedule)
+
+
+def read_chunks(path, chunk_size):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def count_rows(path):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).metadata.num_rows
+    return None
+
+
+def _columns(functions):
+    # Union of the fields the functions return, in first-seen order, with
+    # the dtype each one comes out as; found by evaluating every function
+    # once on unit inputs.
+    columns = {}
+    for function in functions.values():
+        parameters = inspect.signature(function).parameters
+        sample = function(**{name: np.ones(1) for name, parameter in parameters.items() if parameter.default is parameter.empty})
+        for name, column in sample.items():
+            columns.setdefault(name, column.dtype)
+    return columns
+
+
+# Every part file has the same columns, whatever calculators its chunk
+# holds, so the output directory reads back as one dataset. Fields a
+# calculator doesn't report are nulls.
+RESULT_COLUMNS = _columns(CALCULATORS)
+SCHEDULE_COLUMNS = {name: dtype for name, dtype in _columns(SCHEDULES).items() if name not in ("scenario", "month")}
+# Scenarios per schedule sub-chunk; a 40-year schedule has 480 rows, so a
+# sub-chunk stays under ~250k rows
+SCHEDULE_SCENARIOS = 500
+
+
+def _nullable(values, present):
+    if values.dtype.kind == "f":
+        return pd.arrays.FloatingArray(values.astype(np.float64), ~present)
+    return pd.arrays.IntegerArray(values.astype(np.int64), ~present)
+
+
+def _inputs(calculator, group):
+    names = inspect.signature(engine.CALCULATORS[calculator]).parameters
+    missing = [name for name in names if name not in group]
+    if missing:
+        raise ValueError(f"{calculator} scenarios are missing columns: {', '.join(missing)}")
+    blank = group[list(names)].isna().any(axis=1)
+    if blank.any():
+        raise ValueError(f"{calculator} scenarios have empty inputs in rows: {list(group.index[blank][:10])}")
+    return {name: group[name].to_numpy() for name in names}
+
+
+def _groups(df, start):
+    # (calculator, positions in the chunk, engine inputs) per calculator
+    unknown = set(df["calculator"]) - set(engine.CALCULATORS)
+    if unknown:
+        raise ValueError(f"Unknown calculator types: {', '.join(sorted(map(str, unknown)))}")
+    df = df.set_axis(pd.RangeIndex(start, start + len(df)))
+    for calculator, positions in df.groupby("calculator", sort=False).indices.items():
+        yield calculator, positions, _inputs(calculator, df.iloc[positions])
+
+
+def price_chunk(df, start, id_column):
+    values = {name: np.zeros(len(df), dtype) for name, dtype in RESULT_COLUMNS.items()}
+    present = {name: np.zeros(len(df), bool) for name in RESULT_COLUMNS}
+    for calculator, positions, inputs in _groups(df, start):
+        for name, column in CALCULATORS[calculator](**inputs).items():
+            values[name][positions] = column
+            present[name][positions] = True
+
+    result = {"row": np.arange(start, start + len(df))}
+    if id_column:
+        result[id_column] = df[id_column].to_numpy()
+    result["calculator"] = df["calculator"].to_numpy()
+    for name in RESULT_COLUMNS:
+        result[name] = _nullable(values[name], present[name])
+    return pd.DataFrame(result)
+
+
+def schedule_chunks(df, start):
+    # Yields ("Schedules", DataFrame) chunks of at most SCHEDULE_SCENARIOS
+    # scenarios each, so a chunk's schedules are never held in memory at once
+    written = False
+    for calculator, positions, inputs in _groups(df, start):
+        if calculator not in SCHEDULES:
+            continue
+        rows = start + positions
+        for schedule in schedules.iter_schedules(SCHEDULES[calculator], chunk_size=SCHEDULE_SCENARIOS, **inputs):
+            yield "Schedules", _schedule_frame(calculator, rows[schedule["scenario"]], schedule)
+            written = True
+    if not written:
+        yield "Schedules", _schedule_frame("", np.zeros(0, np.int64), {"month": np.zeros(0, np.int64)})
+
+
+def _schedule_frame(calculator, rows, schedule):
+    frame = {"row": rows, "calculator": np.full(rows.size, calculator), "month": schedule["month"]}
+    for name, dtype in SCHEDULE_COLUMNS.items():
+        column = schedule.get(name)
+        if column is None:
+            frame[name] = _nullable(np.zeros(rows.size, dtype), np.zeros(rows.size, bool))
+        else:
+            frame[name] = _nullable(column, np.ones(rows.size, bool))
+    return pd.DataFrame(frame)
+
+
+def _part_path(directory, index, fmt):
+    return os.path.join(directory, f"part-{index:05d}.{exports.FORMATS[fmt]['extension']}")
+
+
+def _write_part(chunks, path, fmt):
+    # Write to a temporary name first so a killed run never leaves a
+    # partial file that a resumed run would mistake for a finished chunk.
+    partial = path + ".partial"
+    exports.write(chunks, fmt, partial)
+    os.replace(partial, path)
+
+
+def run_chunk(index, df, start, options):
+    if options["schedules"]:
+        schedule_path = _part_path(os.path.join(options["output"], "schedules"), index, options["format"])
+        _write_part(schedule_chunks(df, start), schedule_path, options["format"])
+    result = price_chunk(df, start, options["id_column"])
+    _write_part([("Results", result)], _part_path(os.path.join(options["output"], "results"), index, options["format"]), options["format"])
+    return index, len(df)
+
+
+def _check_manifest(output, manifest):
+    path = os.path.join(output, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as handle:
+            previous = json.load(handle)
+        if previous != manifest:
+            raise SystemExit(
+                f"{output} holds a run with different settings ({previous}); "
+                "use a new output directory or rerun with the same arguments"
+            )
+    else:
+        with open(path, "w") as handle:
+            json.dump(manifest, handle, indent=2)
+
+
+def run(input_path, output, chunk_size=50000, workers=None, fmt="parquet", id_column=None, with_schedules=False, progress=sys.stderr):
+    options = {
+        "output": output,
+        "format": fmt,
+        "id_column": id_column,
+        "schedules": with_schedules,
+    }
+    os.makedirs(os.path.join(output, "results"), exist_ok=True)
+    if with_schedules:
+        os.makedirs(os.path.join(output, "schedules"), exist_ok=True)
+    _check_manifest(output, {
+        "input": os.path.abspath(input_path),
+        "chunk_size": chunk_size,
+        "format": fmt,
+        "id_column": id_column,
+        "schedules": with_schedules,
+        "columns": {"results": list(RESULT_COLUMNS), "schedules": list(SCHEDULE_COLUMNS) if with_schedules else None},
+    })
+
+    total_rows = count_rows(input_path)
+    workers = workers or os.cpu_count()
+    # At most two chunks per worker are read ahead, which bounds memory
+    # regardless of input size.
+    max_pending = workers * 2
+    started = time.perf_counter()
+    done_rows = 0
+    skipped = 0
+
+    def report(finished):
+        nonlocal done_rows
+        for future in finished:
+            index, rows = future.result()
+            done_rows += rows
+            elapsed = time.perf_counter() - started
+            of_total = f"/{total_rows:,}" if total_rows else ""
+            print(f"chunk {index}: {done_rows:,}{of_total} rows in {elapsed:.1f}s "
+                  f"({done_rows / elapsed:,.0f} rows/s)", file=progress)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        start = 0
+        for index, df in enumerate(read_chunks(input_path, chunk_size)):
+            if os.path.exists(_part_path(os.path.join(output, "results"), index, fmt)):
+                skipped += 1
+            else:
+                pending.add(pool.submit(run_chunk, index, df, start, options))
+            start += len(df)
+            if len(pending) >= max_pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                report(finished)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            report(finished)
+
+    if skipped:
+        print(f"skipped {skipped} chunk(s) already in {output}", file=progress)
+    return done_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Price client scenarios in bulk without the Streamlit UI.")
+    parser.add_argument("input", help="CSV or Parquet file with one scenario per row and a 'calculator' column")
+    parser.add_argument("output", help="directory for result (and schedule) part files")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="scenarios per chunk (default: 50000)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet", help="output file format")
+    parser.add_argument("--id-column", default=None, help="input column copied to the output, e.g. client_id")
+    parser.add_argument("--schedules", action="store_true", help="also write month-by-month schedules")
+    args = parser.parse_args(argv)
+
+    run(
+        args.input,
+        args.output,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        fmt=args.format,
+        id_column=args.id_column,
+        with_schedules=args.schedules,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Bounded LRU cache for calculator results and rendered artifacts.
+#
+# One entry per scenario, keyed on the calculator name and its normalized
+# inputs. An entry holds named fields (numeric result, chart, table,
+# export bytes) that are filled lazily, so a scenario that has already been
+# calculated by any user is served without recomputing or re-rendering.
+# When the cache is full the least recently used scenario is dropped with
+# all its fields.
+
+DEFAULT_MAX_ENTRIES = 128
+
+
+def max_entries_from_env(default=DEFAULT_MAX_ENTRIES):
+    return int(os.environ.get("CALCULATOR_CACHE_SIZE", default))
+
+
+def _normalize(value):
+    # Slider floats such as 6.000000000000001 and 6.0 must share an entry
+    if isinstance(value, float):
+        value = round(value, 6)
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def make_key(calculator, **inputs):
+    return (calculator,) + tuple((name, _normalize(inputs[name])) for name in sorted(inputs))
+
+
+class ResultCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, field, factory):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if field in entry:
+                    self.hits += 1
+                    return entry[field]
+            self.misses += 1
+
+        # Build outside the lock so one slow render doesn't block other users
+        value = factory()
+
+        with self._lock:
+            entry = self._entries.setdefault(key, {})
+            self._entries.move_to_end(key)
+            entry.setdefault(field, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry[field]
+
+    # Cached value of a field, or None without recording a miss; for
+    # callers that build the value asynchronously and store it with put()
+    def peek(self, key, field):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or field not in entry:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[field]
+
+    def put(self, key, field, value):
+        with self._lock:
+            self.misses += 1
+            self._entries.setdefault(key, {})[field] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,155 @@
+import numpy as np
+
+# Calculation engine shared by the Streamlit UI and batch jobs.
+#
+# Every function takes scalars or arrays (annual rate in %, tenure in years,
+# amounts in ₹), broadcasts them against each other and returns a dict of
+# NumPy arrays, one entry per scenario. Rounding follows the UI exactly so
+# batch results match what a user sees on screen to the rupee.
+
+
+def _broadcast(*values):
+    return np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in values])
+
+
+def _power(base, exponent):
+    # np.power may use SIMD kernels that differ from libm in the last bit,
+    # which flips round() on exact .5 ties (e.g. a ₹5,00,000 FD at 1% for 3
+    # years). Slider inputs repeat heavily, so evaluate Python's float pow
+    # once per unique (base, exponent) pair and scatter the results back.
+    # Inputs off the slider grid (arbitrary rates in a bulk file) have few
+    # repeats and fall back to one Python pow per pair: about 2.6 s per 1M
+    # scenarios, against 0.1 s for slider-grid rates.
+    base, exponent = np.broadcast_arrays(base, exponent)
+    if base.size == 0:
+        return np.empty(base.shape)
+    bases, base_index = np.unique(base.ravel(), return_inverse=True)
+    exponents, exponent_index = np.unique(exponent.ravel(), return_inverse=True)
+    if bases.size * exponents.size <= base.size:
+        # Grid-shaped input (few rates x few tenures): tabulate every pair
+        table = np.array([[b ** e for e in exponents.tolist()] for b in bases.tolist()], dtype=np.float64)
+        return table[base_index, exponent_index].reshape(base.shape)
+    pairs = np.stack([base.ravel(), exponent.ravel()], axis=1)
+    unique, inverse = np.unique(pairs, axis=0, return_inverse=True)
+    values = np.array([b ** e for b, e in unique.tolist()], dtype=np.float64)
+    return values[inverse.ravel()].reshape(base.shape)
+
+
+def _round(values):
+    # np.rint rounds half to even, same as Python's round()
+    return np.rint(values).astype(np.int64)
+
+
+def _monthly_rate(rate):
+    return rate / 12 / 100
+
+
+def _annuity_factor(monthly_rate, months):
+    # ((1 + r) ** n - 1) / r, with the r -> 0 limit of n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = (_power(1 + monthly_rate, months) - 1) / monthly_rate
+    return np.where(monthly_rate == 0, months, factor)
+
+
+def as_scalars(result):
+    return {key: value.item() for key, value in result.items()}
+
+
+# SIP
+def sip(principal, rate, time):
+    principal, rate, time = _broadcast(principal, rate, time)
+    months = time * 12
+    monthly_rate = _monthly_rate(rate)
+    amount = _round(principal * _annuity_factor(monthly_rate, months) * (1 + monthly_rate))
+    investment = _round(principal * months)
+    return {"maturity": amount, "investment": investment, "earnings": amount - investment}
+
+
+# Step-up SIP
+def stepup_sip(principal, increment, rate, time):
+    principal, increment, rate, time = _broadcast(principal, increment, rate, time)
+    monthly_rate = _monthly_rate(rate)
+    yearly_factor = _annuity_factor(monthly_rate, 12) * (1 + monthly_rate)
+    # sum of (principal + increment * i) for i in range(time)
+    contributions = principal * time + increment * time * (time - 1) / 2
+    amount = _round(contributions * yearly_factor)
+    investment = _round(contributions * 12)
+    return {"maturity": amount, "investment": investment, "earnings": amount - investment}
+
+
+# SWP
+def swp(principal, rate, time, monthly_withdrawal):
+    principal, rate, time, monthly_withdrawal = _broadcast(principal, rate, time, monthly_withdrawal)
+    months = time * 12
+    maturity = _round(principal * _power(1 + _monthly_rate(rate), months))
+    investment = _round(principal)
+    return {
+        "maturity": maturity,
+        "investment": investment,
+        "earnings": maturity - investment,
+        "balance": _swp_balance(maturity, months, monthly_withdrawal),
+    }
+
+
+def _swp_balance(maturity, months, monthly_withdrawal):
+    # Withdrawals stop once the balance is exhausted; the month that crosses
+    # zero still takes the full withdrawal, as in the UI schedule.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        paid_months = np.ceil(maturity / monthly_withdrawal)
+    paid_months = np.where(monthly_withdrawal > 0, paid_months, months)
+    return _round(np.where(months > paid_months, 0, maturity - months * monthly_withdrawal))
+
+
+# Goal-based SIP
+def goal_based_sip(goal_amount, rate, time):
+    goal_amount, rate, time = _broadcast(goal_amount, rate, time)
+    months = time * 12
+    monthly_rate = _monthly_rate(rate)
+    required_sip = _round(goal_amount / _annuity_factor(monthly_rate, months) * (1 + monthly_rate))
+    maturity = _round(goal_amount)
+    investment = _round(required_sip * months)
+    return {
+        "sip": required_sip,
+        "maturity": maturity,
+        "investment": investment,
+        "earnings": maturity - investment,
+    }
+
+
+# Fixed Deposit
+def fd(principal, rate, time):
+    principal, rate, time = _broadcast(principal, rate, time)
+    maturity = _round(principal * _power(1 + rate / 100, time))
+    investment = _round(principal)
+    return {"maturity": maturity, "investment": investment, "earnings": maturity - investment}
+
+
+# EMI
+def emi(loan_amount, rate, time):
+    # The nominal totals are EMI x months, the figure a loan quote shows.
+    # A lender's statement differs by up to a few rupees, since interest is
+    # rounded monthly and the last instalment pays off the balance; use
+    # amortization.emi for totals that reconcile with the schedule.
+    loan_amount, rate, time = _broadcast(loan_amount, rate, time)
+    months = time * 12
+    monthly_rate = _monthly_rate(rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = _power(1 + monthly_rate, months)
+        payment = (loan_amount * monthly_rate * growth) / (growth - 1)
+    payment = _round(np.where(monthly_rate == 0, loan_amount / months, payment))
+    total_payment = _round(payment * months)
+    return {
+        "emi": payment,
+        "nominal_total_payment": total_payment,
+        "nominal_total_interest": total_payment - _round(loan_amount),
+    }
+
+
+CALCULATORS = {
+    "sip": sip,
+    "stepup_sip": stepup_sip,
+    "swp": swp,
+    "goal_based_sip": goal_based_sip,
+    "fd": fd,
+    "emi": emi,
+}
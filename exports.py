@@ -0,0 +1,135 @@
+import os
+from contextlib import contextmanager
+from io import BytesIO
+
+# Streaming table exports.
+#
+# Every writer takes an iterable of (sheet_name, DataFrame) chunks and
+# writes them in a single pass, so a multi-scenario export only holds one
+# chunk in memory at a time. Consecutive chunks with the same sheet name
+# are appended to the same sheet (xlsx) or simply continue the file (CSV,
+# Parquet row groups); all chunks of a CSV or Parquet export must share
+# the same columns.
+
+FORMATS = {
+    "xlsx": {
+        "label": "Excel",
+        "extension": "xlsx",
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    },
+    "csv": {
+        "label": "CSV",
+        "extension": "csv",
+        "mime": "text/csv",
+    },
+    "parquet": {
+        "label": "Parquet",
+        "extension": "parquet",
+        "mime": "application/vnd.apache.parquet",
+    },
+}
+
+# Excel's limits per worksheet
+SHEET_ROWS = 1048576
+SHEET_NAME_LENGTH = 31
+
+
+@contextmanager
+def _open(target):
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "wb") as handle:
+            yield handle
+    else:
+        yield target
+
+
+def _sheet_name(name, used):
+    # Excel sheet names are unique (case-insensitively) and at most 31
+    # characters; a name that is taken continues as "Name (2)", "Name (3)"...
+    candidate, number = name, 1
+    while candidate.lower() in used:
+        number += 1
+        suffix = f" ({number})"
+        candidate = name[:SHEET_NAME_LENGTH - len(suffix)].rstrip() + suffix
+    used.add(candidate.lower())
+    return candidate
+
+
+def _add_sheet(workbook, sheet_name, used, header):
+    worksheet = workbook.add_worksheet(_sheet_name(sheet_name, used))
+    worksheet.write_row(0, 0, header)
+    return worksheet
+
+
+def write_xlsx(chunks, target):
+    import xlsxwriter
+
+    # constant_memory flushes each row to a temp file as soon as the next
+    # row starts, instead of keeping the whole sheet as cell objects. It also
+    # means a finished sheet can't be reopened, so a sheet name that comes
+    # back after another sheet, or a sheet that reaches Excel's row limit,
+    # continues on a new sheet named "Name (2)" and so on.
+    workbook = xlsxwriter.Workbook(target, {"constant_memory": True})
+    try:
+        used = set()
+        worksheet = None
+        current = None
+        row = 0
+        for sheet_name, df in chunks:
+            header = [str(column) for column in df.columns]
+            if sheet_name != current:
+                current = sheet_name
+                worksheet = _add_sheet(workbook, sheet_name, used, header)
+                row = 1
+            for values in df.itertuples(index=False, name=None):
+                if row == SHEET_ROWS:
+                    worksheet = _add_sheet(workbook, sheet_name, used, header)
+                    row = 1
+                if worksheet.write_row(row, 0, values) != 0:
+                    raise ValueError(f"could not write row {row + 1} of sheet {worksheet.name!r}")
+                row += 1
+    finally:
+        workbook.close()
+
+
+def write_csv(chunks, target):
+    with _open(target) as handle:
+        header = True
+        for _, df in chunks:
+            handle.write(df.to_csv(index=False, header=header).encode("utf-8"))
+            header = False
+
+
+def write_parquet(chunks, target):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for _, df in chunks:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(target, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+WRITERS = {
+    "xlsx": write_xlsx,
+    "csv": write_csv,
+    "parquet": write_parquet,
+}
+
+
+def write(chunks, fmt, target):
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    WRITERS[fmt](chunks, target)
+
+
+def to_bytes(chunks, fmt):
+    buffer = BytesIO()
+    write(chunks, fmt, buffer)
+    return buffer.getvalue()
@@ -1,27 +1,170 @@
 import streamlit as st
-import pandas as pd
-from io import BytesIO
-import matplotlib.pyplot as plt
+
+import amortization
+import cache
+import engine
+import exports
+import profiling
+import schedules
+import simulation
+import surface
 
 # Format currency
 def format_currency(value):
     return f"₹{round(value):,}"
 
+# Format an amount held in paise
+def format_paise(value):
+    return f"₹{value / 100:,.2f}"
+
+# Results and rendered artifacts shared by all sessions on this server
+@st.cache_resource
+def get_result_cache():
+    return cache.ResultCache(cache.max_entries_from_env())
+
+# Precomputed slider results, memory-mapped once per server process
+@st.cache_resource
+def get_surface():
+    return surface.load()
+
+# Look the scenario up in the precomputed table, computing it live when
+# there is no table or the inputs are off its grid
+def calculate(calculator, **inputs):
+    table = get_surface()
+    result = table.lookup(calculator, **inputs) if table else None
+    if result is None:
+        result = engine.as_scalars(engine.CALCULATORS[calculator](**inputs))
+    return result
+
+# Charts are Vega-Lite specs drawn by the browser, so reruns don't import
+# or render with matplotlib. pandas is likewise only imported by the code
+# paths that build tables.
+
+# Pie chart with percentage labels
+def pie_chart(sizes, labels, colors):
+    total = sum(sizes)
+    values = [
+        {"label": label, "value": float(size), "share": float(size) / total if total else 0}
+        for label, size in zip(labels, sizes)
+    ]
+    return {
+        "data": {"values": values},
+        "encoding": {
+            "theta": {"field": "value", "type": "quantitative", "stack": True},
+            "color": {
+                "field": "label", "type": "nominal", "legend": {"title": None},
+                "scale": {"domain": list(labels), "range": list(colors)}
+            },
+            "order": {"field": "label", "sort": "descending"}
+        },
+        "layer": [
+            {"mark": {"type": "arc", "outerRadius": 120}},
+            {
+                "mark": {"type": "text", "radius": 145},
+                "encoding": {"text": {"field": "share", "type": "quantitative", "format": ".1%"}}
+            }
+        ],
+        "view": {"stroke": None}
+    }
+
+# Download buttons for every export format. Files are only built when a
+# button is clicked, then kept in the result cache for later downloads.
+def download_buttons(results, key, df, sheet_name, label, file_stem):
+    def export(fmt):
+        # Runs on click, after the Calculate profile has been written, so
+        # the export is logged as a record of its own
+        return profiling.timed(key[0], "export:" + fmt, lambda: exports.to_bytes([(sheet_name, df)], fmt))
+
+    for column, (fmt, export_format) in zip(st.columns(len(exports.FORMATS)), exports.FORMATS.items()):
+        with column:
+            st.download_button(
+                label=f"{label} as {export_format['label']}",
+                data=lambda fmt=fmt: results.get(key, "export:" + fmt, lambda: export(fmt)),
+                file_name=f"{file_stem}.{export_format['extension']}",
+                mime=export_format["mime"],
+                on_click="ignore"
+            )
+
+# Stage timings of a Calculate click (CALCULATOR_PROFILE=1): written to the
+# profile log and kept for the sidebar debug panel
+def finish_profile(profile):
+    record = profile.finish()
+    if record is not None:
+        st.session_state["profile"] = record
+
+def profile_panel():
+    with st.sidebar.expander("Profiling", expanded=True):
+        record = st.session_state.get("profile")
+        if record is None:
+            st.caption("Click Calculate to time a run.")
+            return
+        st.caption(f"{record['calculator']}: {record['total'] * 1000:.1f} ms total")
+        st.table({"Stage": list(record["stages"]), "ms": [round(seconds * 1000, 2) for seconds in record["stages"].values()]})
+        st.caption(f"Logged to {profiling.log_path()}")
+
+# Monte Carlo settings, shown above the Calculate button so that changing
+# them doesn't clear the results
+def simulation_inputs():
+    if not st.checkbox("Simulate market returns (Monte Carlo)"):
+        return None
+    volatility = st.slider("Annual Volatility (%)", min_value=1.0, max_value=40.0, value=15.0, step=0.5)
+    return {"volatility": volatility, "paths": 10000, "seed": 0}
+
+def show_simulation(result, label="Final Amount", note=None):
+    percentiles = list(result["percentiles"])
+    maturity = dict(zip(percentiles, result["maturity"]))
+
+    st.write("### Simulated Outcomes:")
+    if note:
+        st.caption(note)
+    st.write(f"Median {label}: {format_currency(maturity[50])}")
+    st.write(f"5th-95th Percentile Range: {format_currency(maturity[5])} - {format_currency(maturity[95])}")
+    if result["withdrawals"]:
+        st.write(f"Probability of Depletion: {result['depletion_probability']:.1%}")
+
+    values = [
+        {"Year": int(month) // 12, "Percentile": f"P{percentile}", "Amount": float(amount)}
+        for percentile, row in zip(percentiles, result["fan"])
+        for month, amount in zip(result["months"], row)
+    ]
+    st.vega_lite_chart(spec={
+        "data": {"values": values},
+        "mark": "line",
+        "encoding": {
+            "x": {"field": "Year", "type": "quantitative"},
+            "y": {"field": "Amount", "type": "quantitative", "title": "₹"},
+            "color": {"field": "Percentile", "type": "nominal", "sort": None}
+        }
+    }, width="stretch")
+
 # SIP Calculator
+def sip_table(principal, rate, time):
+    import pandas as pd
+
+    schedule = schedules.sip_schedule(principal, rate, time)
+    return pd.DataFrame({
+        "Month": schedule["month"],
+        "Investment": schedule["contribution"].cumsum().round().astype(int),
+        "Amount": schedule["balance"].round().astype(int)
+    })
+
 def sip_calculator():
     st.header("SIP Calculator")
     principal = st.slider("Monthly Investment (₹)", min_value=500, max_value=50000, value=1000, step=500)
     rate = st.slider("Annual Rate of Interest (%)", min_value=1.0, max_value=15.0, value=6.0, step=0.1)
     time = st.slider("Investment Period (years)", min_value=1, max_value=30, value=10, step=1)
 
-    if st.button("Calculate SIP"):
-        months = time * 12
-        monthly_rate = rate / 12 / 100
-        amount = principal * (((1 + monthly_rate) ** months - 1) / monthly_rate) * (1 + monthly_rate)
-        amount = round(amount)
+    simulation_options = simulation_inputs()
 
-        total_investment = principal * months
-        earnings = amount - total_investment
+    if st.button("Calculate SIP"):
+        profile = profiling.Profile("sip")
+        results = get_result_cache()
+        key = cache.make_key("sip", principal=principal, rate=rate, time=time)
+        with profile.stage("compute"):
+            result = results.get(key, "result", lambda: calculate("sip", principal=principal, rate=rate, time=time))
+        amount = result["maturity"]
+        total_investment = result["investment"]
+        earnings = result["earnings"]
 
         st.write("### Results:")
         st.write(f"Total Investment: {format_currency(total_investment)}")
@@ -32,27 +175,34 @@ def sip_calculator():
         sizes = [total_investment, earnings]
         colors = ['#4CAF50', '#FFC107']
 
-        fig, ax = plt.subplots()
-        ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
-        ax.axis('equal')
-        st.pyplot(fig)
+        with profile.stage("chart"):
+            st.vega_lite_chart(spec=pie_chart(sizes, labels, colors))
+
+        with profile.stage("table"):
+            df = results.get(key, "table", lambda: sip_table(principal, rate, time))
+        with profile.stage("display"):
+            st.dataframe(df)
 
-        df = pd.DataFrame({"Month": range(1, months + 1), "Remaining Amount": [amount] * months})
-        st.dataframe(df)
+        download_buttons(results, key, df, 'SIP Data', "Download SIP Data", "sip_data")
 
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='SIP Data')
+        if simulation_options:
+            simulation_key = cache.make_key("sip_simulation", principal=principal, rate=rate, time=time, **simulation_options)
+            with profile.stage("simulation"):
+                show_simulation(results.get(simulation_key, "result", lambda: simulation.simulate_sip(principal, rate, time, **simulation_options)))
 
-        excel_buffer.seek(0)
-        st.download_button(
-            label="Download SIP Data as Excel",
-            data=excel_buffer,
-            file_name="sip_data.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        finish_profile(profile)
 
 # Step-up SIP Calculator
+def stepup_sip_table(principal, increment, rate, time):
+    import pandas as pd
+
+    schedule = schedules.stepup_sip_schedule(principal, increment, rate, time)
+    return pd.DataFrame({
+        "Year": range(1, time + 1),
+        "Investment": schedule["contribution"].cumsum()[11::12].round().astype(int),
+        "Amount": schedule["balance"][11::12].round().astype(int)
+    })
+
 def stepup_sip_calculator():
     st.header("Step-up SIP Calculator")
     principal = st.slider("Initial Monthly Investment (₹)", min_value=500, max_value=50000, value=1000, step=500)
@@ -60,20 +210,17 @@ def stepup_sip_calculator():
     rate = st.slider("Annual Rate of Interest (%)", min_value=1.0, max_value=15.0, value=6.0, step=0.1)
     time = st.slider("Investment Period (years)", min_value=1, max_value=30, value=10, step=1)
 
-    if st.button("Calculate Step-up SIP"):
-        months = time * 12
-        monthly_rate = rate / 12 / 100
-        total_investment = 0
-        total_amount = 0
-
-        for i in range(time):
-            yearly_investment = principal + (increment * i)
-            yearly_amount = yearly_investment * (((1 + monthly_rate) ** 12 - 1) / monthly_rate) * (1 + monthly_rate)
-            total_investment += yearly_investment * 12
-            total_amount += yearly_amount
+    simulation_options = simulation_inputs()
 
-        total_amount = round(total_amount)
-        earnings = total_amount - total_investment
+    if st.button("Calculate Step-up SIP"):
+        profile = profiling.Profile("stepup_sip")
+        results = get_result_cache()
+        key = cache.make_key("stepup_sip", principal=principal, increment=increment, rate=rate, time=time)
+        with profile.stage("compute"):
+            result = results.get(key, "result", lambda: engine.as_scalars(engine.stepup_sip(principal, increment, rate, time)))
+        total_amount = result["maturity"]
+        total_investment = result["investment"]
+        earnings = result["earnings"]
 
         st.write("### Results:")
         st.write(f"Total Investment: {format_currency(total_investment)}")
@@ -84,27 +231,30 @@ def stepup_sip_calculator():
         sizes = [total_investment, earnings]
         colors = ['#2196F3', '#FF5722']
 
-        fig, ax = plt.subplots()
-        ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
-        ax.axis('equal')
-        st.pyplot(fig)
+        with profile.stage("chart"):
+            st.vega_lite_chart(spec=pie_chart(sizes, labels, colors))
+
+        with profile.stage("table"):
+            df = results.get(key, "table", lambda: stepup_sip_table(principal, increment, rate, time))
+        with profile.stage("display"):
+            st.dataframe(df)
 
-        df = pd.DataFrame({"Year": range(1, time + 1), "Investment": [total_investment] * time, "Amount": [total_amount] * time})
-        st.dataframe(df)
+        download_buttons(results, key, df, 'Step-up SIP Data', "Download Step-up SIP Data", "stepup_sip_data")
 
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Step-up SIP Data')
+        if simulation_options:
+            simulation_key = cache.make_key("stepup_sip_simulation", principal=principal, increment=increment, rate=rate, time=time, **simulation_options)
+            with profile.stage("simulation"):
+                show_simulation(results.get(simulation_key, "result", lambda: simulation.simulate_stepup_sip(principal, increment, rate, time, **simulation_options)))
 
-        excel_buffer.seek(0)
-        st.download_button(
-            label="Download Step-up SIP Data as Excel",
-            data=excel_buffer,
-            file_name="stepup_sip_data.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        finish_profile(profile)
 
 # SWP Calculator
+def swp_table(principal, rate, time, monthly_withdrawal):
+    import pandas as pd
+
+    schedule = schedules.swp_schedule(principal, rate, time, monthly_withdrawal)
+    return pd.DataFrame({"Month": schedule["month"], "Remaining Amount": schedule["balance"].astype(int)})
+
 def swp_calculator():
     st.header("SWP Calculator")
     principal = st.slider("Principal Amount (₹)", min_value=10000, max_value=5000000, value=100000, step=5000)
@@ -112,49 +262,47 @@ def swp_calculator():
     time = st.slider("Investment Period (years)", min_value=1, max_value=30, value=5, step=1)
     monthly_withdrawal = st.slider("Monthly Withdrawal Amount (₹)", min_value=500, max_value=50000, value=5000, step=500)
 
+    simulation_options = simulation_inputs()
+
     if st.button("Calculate SWP"):
-        months = time * 12
-        monthly_rate = rate / 12 / 100
-        maturity_amount = principal * (1 + monthly_rate) ** months
-        maturity_amount = round(maturity_amount)
-
-        remaining_amount = maturity_amount
-        withdrawals = []
-        for month in range(1, months + 1):
-            if remaining_amount > 0:
-                remaining_amount -= monthly_withdrawal
-            else:
-                remaining_amount = 0
-            withdrawals.append([month, remaining_amount])
+        profile = profiling.Profile("swp")
+        results = get_result_cache()
+        key = cache.make_key("swp", principal=principal, rate=rate, time=time, monthly_withdrawal=monthly_withdrawal)
+        with profile.stage("compute"):
+            result = results.get(key, "result", lambda: calculate("swp", principal=principal, rate=rate, time=time, monthly_withdrawal=monthly_withdrawal))
+        maturity_amount = result["maturity"]
 
         st.write("### Results:")
         st.write(f"Principal Amount: {format_currency(principal)}")
         st.write(f"Final Maturity Amount: {format_currency(maturity_amount)}")
 
-        earnings = maturity_amount - principal
+        earnings = result["earnings"]
         labels = ['Principal Amount', 'Earnings']
         sizes = [principal, earnings]
         colors = ['#FF5722', '#4CAF50']
 
-        fig, ax = plt.subplots()
-        ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
-        ax.axis('equal')
-        st.pyplot(fig)
+        with profile.stage("chart"):
+            st.vega_lite_chart(spec=pie_chart(sizes, labels, colors))
+
+        with profile.stage("table"):
+            withdrawal_df = results.get(key, "table", lambda: swp_table(principal, rate, time, monthly_withdrawal))
+        with profile.stage("display"):
+            st.dataframe(withdrawal_df)
 
-        withdrawal_df = pd.DataFrame(withdrawals, columns=["Month", "Remaining Amount"])
-        st.dataframe(withdrawal_df)
+        download_buttons(results, key, withdrawal_df, 'SWP Data', "Download SWP Data", "swp_data")
 
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            withdrawal_df.to_excel(writer, index=False, sheet_name='SWP Data')
+        if simulation_options:
+            simulation_key = cache.make_key("swp_simulation", principal=principal, rate=rate, time=time, monthly_withdrawal=monthly_withdrawal, **simulation_options)
+            with profile.stage("simulation"):
+                show_simulation(
+                    results.get(simulation_key, "result", lambda: simulation.simulate_swp(principal, rate, time, monthly_withdrawal, **simulation_options)),
+                    label="Balance After Withdrawals",
+                    note="The simulation withdraws every month from the first month on while the rest keeps earning, "
+                         "so its balance is not comparable with the Final Maturity Amount above, which grows the whole "
+                         "principal for the full period."
+                )
 
-        excel_buffer.seek(0)
-        st.download_button(
-            label="Download SWP Data as Excel",
-            data=excel_buffer,
-            file_name="swp_data.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        finish_profile(profile)
 
 # Goal-based SIP Calculator
 def goal_based_sip_calculator():
@@ -165,9 +313,12 @@ def goal_based_sip_calculator():
 
     if st.button("Calculate Goal-based SIP"):
         months = time * 12
-        monthly_rate = rate / 12 / 100
-        required_sip = goal_amount / (((1 + monthly_rate) ** months - 1) / monthly_rate) * (1 + monthly_rate)
-        required_sip = round(required_sip)
+        profile = profiling.Profile("goal_based_sip")
+        results = get_result_cache()
+        key = cache.make_key("goal_based_sip", goal_amount=goal_amount, rate=rate, time=time)
+        with profile.stage("compute"):
+            result = results.get(key, "result", lambda: calculate("goal_based_sip", goal_amount=goal_amount, rate=rate, time=time))
+        required_sip = result["sip"]
 
         st.write("### Results:")
         st.write(f"Required SIP per Month: {format_currency(required_sip)}")
@@ -176,12 +327,17 @@ def goal_based_sip_calculator():
         sizes = [goal_amount, required_sip * months]
         colors = ['#8BC34A', '#FF9800']
 
-        fig, ax = plt.subplots()
-        ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
-        ax.axis('equal')
-        st.pyplot(fig)
+        with profile.stage("chart"):
+            st.vega_lite_chart(spec=pie_chart(sizes, labels, colors))
+
+        finish_profile(profile)
 
 # Fixed Deposit Calculator
+def fd_table(principal, maturity_amount, earnings):
+    import pandas as pd
+
+    return pd.DataFrame({"Principal": [principal], "Maturity Amount": [maturity_amount], "Earnings": [earnings]})
+
 def fd_calculator():
     st.header("FD Calculator")
     principal = st.slider("Principal Amount (₹)", min_value=10000, max_value=5000000, value=100000, step=5000)
@@ -189,41 +345,50 @@ def fd_calculator():
     time = st.slider("Investment Period (years)", min_value=1, max_value=10, value=5, step=1)
 
     if st.button("Calculate FD"):
-        maturity_amount = principal * (1 + rate / 100) ** time
-        maturity_amount = round(maturity_amount)
+        profile = profiling.Profile("fd")
+        results = get_result_cache()
+        key = cache.make_key("fd", principal=principal, rate=rate, time=time)
+        with profile.stage("compute"):
+            result = results.get(key, "result", lambda: calculate("fd", principal=principal, rate=rate, time=time))
+        maturity_amount = result["maturity"]
 
         st.write("### Results:")
         st.write(f"Principal Amount: {format_currency(principal)}")
         st.write(f"Final Maturity Amount: {format_currency(maturity_amount)}")
-        earnings = maturity_amount - principal
+        earnings = result["earnings"]
         st.write(f"Earnings: {format_currency(earnings)}")
 
         labels = ['Principal Amount', 'Earnings']
         sizes = [principal, earnings]
         colors = ['#009688', '#FFC107']
 
-        fig, ax = plt.subplots()
-        ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
-        ax.axis('equal')
-        st.pyplot(fig)
+        with profile.stage("chart"):
+            st.vega_lite_chart(spec=pie_chart(sizes, labels, colors))
+
+        with profile.stage("table"):
+            fd_df = results.get(key, "table", lambda: fd_table(principal, maturity_amount, earnings))
 
-        fd_data = {"Principal": [principal], "Maturity Amount": [maturity_amount], "Earnings": [earnings]}
-        fd_df = pd.DataFrame(fd_data)
+        with profile.stage("display"):
+            st.dataframe(fd_df)
 
-        st.dataframe(fd_df)
+        download_buttons(results, key, fd_df, 'FD Data', "Download FD Data", "fd_data")
 
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            fd_df.to_excel(writer, index=False, sheet_name='FD Data')
+        finish_profile(profile)
 
-        excel_buffer.seek(0)
-        st.download_button(
-            label="Download FD Data as Excel",
-            data=excel_buffer,
-            file_name="fd_data.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
 # EMI Calculator
+# The schedule is amortized in paise with the last instalment adjusted, so
+# its rows add up to the totals shown and it ends on a zero balance
+def emi_table(schedule):
+    import pandas as pd
+
+    return pd.DataFrame({
+        "Month": schedule["month"],
+        "EMI (₹)": schedule["payment"] / 100,
+        "Principal Paid (₹)": schedule["principal"] / 100,
+        "Interest Paid (₹)": schedule["interest"] / 100,
+        "Outstanding Principal (₹)": schedule["balance"] / 100
+    })
+
 def emi_calculator():
     st.header("EMI Calculator 💳")
 
@@ -234,60 +399,90 @@ def emi_calculator():
 
     # Calculate EMI
     if st.button("Calculate EMI"):
-        monthly_interest_rate = (annual_interest_rate / 12) / 100
-        total_months = tenure_years * 12
-        emi = (loan_amount * monthly_interest_rate * (1 + monthly_interest_rate) ** total_months) / ((1 + monthly_interest_rate) ** total_months - 1)
-        emi = round(emi)
-        total_payment = emi * total_months
-        total_interest = total_payment - loan_amount
+        profile = profiling.Profile("emi")
+        results = get_result_cache()
+        key = cache.make_key("emi", loan_amount=loan_amount, rate=annual_interest_rate, time=tenure_years)
+        with profile.stage("compute"):
+            schedule = results.get(key, "schedule", lambda: amortization.amortize(loan_amount, annual_interest_rate, tenure_years))
+            result = results.get(key, "result", lambda: engine.as_scalars(amortization.summarize(schedule)))
+        emi = result["emi"]
+        total_payment = result["total_payment"]
+        total_interest = result["total_interest"]
 
         # Results
-        st.write(f"### EMI Amount: ₹{emi}")
-        st.write(f"### Total Payment: ₹{total_payment}")
-        st.write(f"### Total Interest: ₹{total_interest}")
+        st.write(f"### EMI Amount: {format_paise(emi)}")
+        st.write(f"### Total Payment: {format_paise(total_payment)}")
+        st.write(f"### Total Interest: {format_paise(total_interest)}")
 
         # Pie chart visualization
         labels = ['Principal Amount', 'Total Interest']
-        sizes = [loan_amount, total_interest]
+        sizes = [loan_amount, total_interest / 100]
         colors = ['#4CAF50', '#FFC107']
 
-        fig, ax = plt.subplots()
-        ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
-        ax.axis('equal')  # Equal aspect ratio ensures the pie is drawn as a circle.
-        st.pyplot(fig)
+        with profile.stage("chart"):
+            st.vega_lite_chart(spec=pie_chart(sizes, labels, colors))
 
         # Data preparation for download
-        data = []
-        outstanding_principal = loan_amount
-        for month in range(1, total_months + 1):
-            interest = outstanding_principal * monthly_interest_rate
-            principal = emi - interest
-            outstanding_principal -= principal
-            data.append({
-                "Month": month,
-                "Principal Paid (₹)": round(principal),
-                "Interest Paid (₹)": round(interest),
-                "Outstanding Principal (₹)": round(outstanding_principal if outstanding_principal > 0 else 0)
-            })
-
-        df = pd.DataFrame(data)
+        with profile.stage("table"):
+            df = results.get(key, "table", lambda: emi_table(schedule))
         st.write("### Detailed EMI Schedule")
-        st.dataframe(df)
+        with profile.stage("display"):
+            st.dataframe(df)
 
         # Download EMI schedule
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name="EMI Schedule")
+        download_buttons(results, key, df, "EMI Schedule", "📥 Download EMI Schedule", "EMI_Schedule")
 
-        excel_buffer.seek(0)
-        st.download_button(
-            label="📥 Download EMI Schedule as Excel",
-            data=excel_buffer,
-            file_name="EMI_Schedule.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        finish_profile(profile)
 
-         
+# Rate x Tenure Sensitivity Heatmap
+def heatmap_chart(rates, times, values, title):
+    records = [
+        {"rate": rate, "time": time, "value": value}
+        for rate, row in zip(rates.tolist(), values.tolist())
+        for time, value in zip(times.tolist(), row)
+    ]
+    return {
+        "title": title,
+        "data": {"values": records},
+        "mark": "rect",
+        "encoding": {
+            "x": {"field": "time", "type": "ordinal", "title": "Investment Period (years)"},
+            "y": {
+                "field": "rate", "type": "ordinal", "sort": "descending", "title": "Annual Rate of Interest (%)",
+                "axis": {"values": [rate for rate in rates.tolist() if rate == int(rate)]}
+            },
+            "color": {"field": "value", "type": "quantitative", "scale": {"scheme": "yellowgreen"}, "title": "₹"},
+            "tooltip": [
+                {"field": "rate", "title": "Rate (%)"},
+                {"field": "time", "title": "Years"},
+                {"field": "value", "title": "₹", "format": ",.0f"}
+            ]
+        },
+        "height": 600
+    }
+
+def sensitivity_heatmap():
+    st.header("Sensitivity Heatmap")
+    heatmap_options = {
+        "SIP Calculator": ("sip", "Monthly Investment (₹)", 1000, "Final Maturity Amount"),
+        "SWP Calculator": ("swp", "Principal Amount (₹)", 100000, "Final Maturity Amount"),
+        "Goal-based SIP Calculator": ("goal_based_sip", "Goal Amount (₹)", 500000, "Required SIP per Month"),
+        "FD Calculator": ("fd", "Principal Amount (₹)", 100000, "Final Maturity Amount"),
+    }
+    calculator, amount_label, default, title = heatmap_options[st.selectbox("Calculator:", list(heatmap_options))]
+    start, stop, step = next(iter(surface.GRIDS[calculator].values()))
+    amount = st.slider(amount_label, min_value=start, max_value=stop, value=default, step=step)
+
+    results = get_result_cache()
+    key = cache.make_key(calculator + "_heatmap", amount=amount)
+
+    def render():
+        table = get_surface()
+        grid = table.rate_tenure(calculator, amount) if table else None
+        rates, times, values = grid if grid is not None else surface.live_rate_tenure(calculator, amount)
+        return heatmap_chart(rates, times, values, f"{title} for {format_currency(amount)}")
+
+    st.vega_lite_chart(spec=results.get(key, "chart", render), width="stretch")
 
 # Main App Logic
 def main():
@@ -300,7 +495,8 @@ def main():
         "SWP Calculator",
         "Goal-based SIP Calculator",
         "FD Calculator",
-        "EMI Calculator"
+        "EMI Calculator",
+        "Sensitivity Heatmap"
     ]
 
     choice = st.sidebar.radio("Select an option:", calculator_options)
@@ -317,6 +513,11 @@ def main():
         fd_calculator()
     elif choice == "EMI Calculator":
         emi_calculator()
+    elif choice == "Sensitivity Heatmap":
+        sensitivity_heatmap()
+
+    if profiling.enabled():
+        profile_panel()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Per-stage timing of calculator runs.
+#
+# Enabled with CALCULATOR_PROFILE=1. Each Calculate click records how long
+# its stages took (compute, table, display, chart, export) and appends one
+# JSON line to CALCULATOR_PROFILE_LOG (default: calculator_profile.jsonl):
+#
+#   {"time": 1700000000.0, "calculator": "sip", "stages": {"compute": 0.0004, ...}, "total": 0.021}
+#
+# When profiling is off, stage() is a no-op context and nothing is written.
+
+DEFAULT_LOG = "calculator_profile.jsonl"
+_write_lock = threading.Lock()
+
+
+def enabled():
+    return os.environ.get("CALCULATOR_PROFILE", "").lower() in ("1", "true", "yes", "on")
+
+
+def log_path():
+    return os.environ.get("CALCULATOR_PROFILE_LOG", DEFAULT_LOG)
+
+
+def write(record):
+    line = json.dumps(record) + "\n"
+    with _write_lock:
+        with open(log_path(), "a") as handle:
+            handle.write(line)
+
+
+class Profile:
+    def __init__(self, calculator, active=None):
+        self.calculator = calculator
+        self.active = enabled() if active is None else active
+        self.stages = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def stage(self, name):
+        return self._timed(name) if self.active else nullcontext()
+
+    def record(self):
+        return {
+            "time": time.time(),
+            "calculator": self.calculator,
+            "stages": self.stages,
+            "total": time.perf_counter() - self.started,
+        }
+
+    def finish(self):
+        if not self.active:
+            return None
+        record = self.record()
+        write(record)
+        return record
+
+
+# Times a single stage that runs outside a Calculate click, such as an
+# export built when a download button is pressed
+def timed(calculator, name, function):
+    profile = Profile(calculator)
+    with profile.stage(name):
+        value = function()
+    profile.finish()
+    return value
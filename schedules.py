@@ -0,0 +1,158 @@
+import numpy as np
+
+import engine
+
+# Month-by-month schedules, built column-wise.
+#
+# Each function takes the same scalar-or-array inputs as its engine
+# counterpart and returns a dict of flat NumPy columns in long format: one
+# row per (scenario, month), with "scenario" and "month" columns alongside
+# the money columns. Balances come from closed forms in the month index, so
+# no per-row Python objects are created.
+
+
+def _expand(months):
+    # Row layout for scenarios of differing lengths: returns the scenario
+    # index and 1-based month number of every row.
+    months = months.astype(np.int64)
+    scenario = np.repeat(np.arange(months.size), months)
+    starts = np.repeat(np.cumsum(months) - months, months)
+    month = np.arange(scenario.size) - starts + 1
+    return scenario, month
+
+
+def _flatten(*values):
+    return [value.ravel() for value in engine._broadcast(*values)]
+
+
+def _growth(monthly_rate, months):
+    return np.power(1 + monthly_rate, months)
+
+
+def _annuity_due(monthly_rate, months):
+    # Value after `months` of a 1/month contribution paid at the start of
+    # each month.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = (_growth(monthly_rate, months) - 1) / monthly_rate * (1 + monthly_rate)
+    return np.where(monthly_rate == 0, months, factor)
+
+
+# EMI amortization
+def emi_schedule(loan_amount, rate, time):
+    loan_amount, rate, time = _flatten(loan_amount, rate, time)
+    payment = engine.emi(loan_amount, rate, time)["emi"].astype(np.float64)
+    scenario, month = _expand(time * 12)
+    loan_amount, payment = loan_amount[scenario], payment[scenario]
+    monthly_rate = engine._monthly_rate(rate)[scenario]
+
+    # B(k) = L * g^k - EMI * (g^k - 1) / r
+    def balance_after(k):
+        growth = _growth(monthly_rate, k)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            repaid = payment * (growth - 1) / monthly_rate
+        return loan_amount * growth - np.where(monthly_rate == 0, payment * k, repaid)
+
+    opening = balance_after(month - 1)
+    interest = opening * monthly_rate
+    # The rounded EMI leaves a few rupees over or short; the last
+    # instalment pays off whatever is left, so every loan closes at zero.
+    # This is a float approximation; amortization.amortize gives the
+    # paise-exact schedule the calculator shows.
+    last = month == (time * 12).astype(np.int64)[scenario]
+    payment = np.where(last, opening + interest, payment)
+    return {
+        "scenario": scenario,
+        "month": month,
+        "contribution": payment,
+        "interest": interest,
+        "principal": payment - interest,
+        "balance": np.where(last, 0, np.maximum(opening - (payment - interest), 0)),
+    }
+
+
+# SIP accumulation
+def sip_schedule(principal, rate, time):
+    principal, rate, time = _flatten(principal, rate, time)
+    scenario, month = _expand(time * 12)
+    principal = principal[scenario]
+    monthly_rate = engine._monthly_rate(rate)[scenario]
+
+    balance = principal * _annuity_due(monthly_rate, month)
+    opening = principal * _annuity_due(monthly_rate, month - 1)
+    return {
+        "scenario": scenario,
+        "month": month,
+        "contribution": principal,
+        "interest": balance - opening - principal,
+        "balance": balance,
+    }
+
+
+# Step-up SIP accumulation
+def stepup_sip_schedule(principal, increment, rate, time):
+    # Mirrors engine.stepup_sip: each year's instalments accumulate for that
+    # year only, and completed years are carried forward at their year-end
+    # value.
+    principal, increment, rate, time = _flatten(principal, increment, rate, time)
+    scenario, month = _expand(time * 12)
+    year, month_in_year = np.divmod(month - 1, 12)
+    month_in_year += 1
+    principal, increment = principal[scenario], increment[scenario]
+    monthly_rate = engine._monthly_rate(rate)[scenario]
+
+    contribution = principal + increment * year
+    # sum of (principal + increment * i) for i in range(year)
+    completed = principal * year + increment * year * (year - 1) / 2
+    carried = completed * _annuity_due(monthly_rate, 12)
+    balance = carried + contribution * _annuity_due(monthly_rate, month_in_year)
+    opening = carried + contribution * _annuity_due(monthly_rate, month_in_year - 1)
+    return {
+        "scenario": scenario,
+        "month": month,
+        "contribution": contribution,
+        "interest": balance - opening - contribution,
+        "balance": balance,
+    }
+
+
+# SWP drawdown
+def swp_schedule(principal, rate, time, monthly_withdrawal):
+    principal, rate, time, monthly_withdrawal = _flatten(principal, rate, time, monthly_withdrawal)
+    maturity = engine.swp(principal, rate, time, monthly_withdrawal)["maturity"]
+    scenario, month = _expand(time * 12)
+    maturity, monthly_withdrawal = maturity[scenario], monthly_withdrawal[scenario]
+
+    # The month that takes the balance to or below zero still withdraws in
+    # full; later months withdraw nothing and report a zero balance.
+    active = maturity - (month - 1) * monthly_withdrawal > 0
+    return {
+        "scenario": scenario,
+        "month": month,
+        "withdrawal": np.where(active, monthly_withdrawal, 0),
+        "balance": np.where(active, maturity - month * monthly_withdrawal, 0),
+    }
+
+
+SCHEDULES = {
+    "emi": emi_schedule,
+    "sip": sip_schedule,
+    "stepup_sip": stepup_sip_schedule,
+    "swp": swp_schedule,
+}
+
+
+# Streaming mode: yields one schedule per chunk of `chunk_size` scenarios so
+# memory stays bounded when thousands of schedules are requested at once.
+# Scenario numbers in every chunk refer to positions in the full input.
+# `kind` is a name in SCHEDULES or a function that builds schedules the same
+# way, such as amortization.amortize.
+def iter_schedules(kind, chunk_size=1000, **inputs):
+    schedule = SCHEDULES[kind] if isinstance(kind, str) else kind
+    names = list(inputs)
+    columns = _flatten(*inputs.values())
+    total = columns[0].size if columns else 0
+    for start in range(0, total, chunk_size):
+        chunk = {name: column[start:start + chunk_size] for name, column in zip(names, columns)}
+        result = schedule(**chunk)
+        result["scenario"] = result["scenario"] + start
+        yield result
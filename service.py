@@ -0,0 +1,343 @@
+import argparse
+import asyncio
+import functools
+import inspect
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import amortization
+import cache
+import engine
+import schedules
+
+# JSON HTTP API around the calculators.
+#
+# A small asyncio HTTP/1.1 server (keep-alive, Content-Length bodies) for
+# other services that need projections without a Streamlit session:
+#
+#   POST /v1/<calculator>            {"principal": 1000, "rate": 6.0, "time": 10}
+#   POST /v1/<calculator>/batch      {"principal": [1000, 5000], "rate": 6.0, "time": [10, 20]}
+#   POST /v1/<kind>/schedule         same inputs; sip, stepup_sip, swp or emi
+#   GET  /health
+#
+# Inputs use the engine's parameter names, and batch inputs broadcast like
+# the engine's. Results are the engine's result dict, with one list per
+# field for batches. Schedules are the long-format columns of schedules.py.
+# EMI results and schedules come from amortization.py, so their money is
+# integer paise, in fields suffixed _paise, and the totals match the
+# schedule rows; the EMI schedule also accepts prepayments, rate_resets and
+# the rounding options.
+#
+# Inputs must be finite and non-negative, with amounts up to MAX_AMOUNT,
+# rates up to MAX_RATE and tenures of at least one month and at most
+# MAX_YEARS years. A batch or schedule of more than MAX_ROWS rows is
+# refused with 413.
+#
+# Identical requests that arrive while one is being computed share its
+# result, and encoded responses are kept in a bounded LRU cache of
+# CALCULATOR_CACHE_SIZE entries (10,000 by default). Batches and schedules
+# beyond INLINE_LIMIT rows, and EMI requests whose amortization runs more
+# than INLINE_MONTHS months (a Python loop of ~30 us a month), are computed
+# and encoded in a worker process pool so the event loop keeps serving
+# small requests.
+#
+#   python service.py --port 8000 --workers 4
+
+INLINE_LIMIT = 1000  # batch scenarios or schedule rows computed on the event loop
+INLINE_MONTHS = 12  # months of EMI amortization computed on the event loop
+# Responses are small next to the UI's tables and exports, so the service
+# keeps many more of them than the app does
+DEFAULT_MAX_ENTRIES = 10000
+MAX_BODY = 64 * 2**20
+MAX_ROWS = 1000000  # batch scenarios or schedule rows in one response
+MAX_YEARS = 100
+MAX_RATE = 100  # % a year
+MAX_AMOUNT = 10**10  # ₹1,000 crore
+
+
+@functools.wraps(amortization.amortize)
+def _emi_schedule(*args, **kwargs):
+    return amortization.paise_columns(amortization.amortize(*args, **kwargs))
+
+
+CALCULATORS = dict(engine.CALCULATORS, emi=amortization.emi)
+SCHEDULES = dict(schedules.SCHEDULES, emi=_emi_schedule)
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _encode(value):
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _columns(result):
+    return {name: column.tolist() for name, column in result.items()}
+
+
+# Request handlers, run inline or in a worker process; each returns the
+# encoded response body
+def price(calculator, inputs):
+    return _encode(engine.as_scalars(CALCULATORS[calculator](**inputs)))
+
+
+def price_batch(calculator, inputs):
+    return _encode(_columns(CALCULATORS[calculator](**inputs)))
+
+
+def build_schedule(kind, inputs):
+    return _encode(_columns(SCHEDULES[kind](**inputs)))
+
+
+def _required(function):
+    return [name for name, parameter in inspect.signature(function).parameters.items() if parameter.default is parameter.empty]
+
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not a number")
+
+
+def _inputs(function, body, scalars):
+    if not isinstance(body, dict):
+        raise RequestError(400, "request body must be a JSON object")
+    parameters = inspect.signature(function).parameters
+    unknown = sorted(set(body) - set(parameters))
+    if unknown:
+        raise RequestError(400, f"unknown inputs: {', '.join(unknown)}")
+    missing = [name for name in _required(function) if name not in body]
+    if missing:
+        raise RequestError(400, f"missing inputs: {', '.join(missing)}")
+    if scalars:
+        for name, value in body.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise RequestError(400, f"{name} must be a number; send lists to the batch endpoint")
+    # The scenario inputs; the options of the EMI schedule are checked by
+    # amortization.amortize itself
+    for name in _required(function):
+        try:
+            values = np.asarray(body[name], dtype=np.float64)
+        except (ValueError, TypeError):
+            raise RequestError(400, f"{name} must be a number or a list of numbers")
+        if not np.isfinite(values).all():
+            raise RequestError(400, f"{name} must be finite")
+        if (values < 0).any():
+            raise RequestError(400, f"{name} must not be negative")
+        if name == "time":
+            # Calculators work in whole months
+            if (np.rint(values * 12) < 1).any() or (values > MAX_YEARS).any():
+                raise RequestError(400, f"time must be at least one month and at most {MAX_YEARS} years")
+        elif name == "rate":
+            if (values > MAX_RATE).any():
+                raise RequestError(400, f"rate must be at most {MAX_RATE}% a year")
+        elif (values > MAX_AMOUNT).any():
+            raise RequestError(400, f"{name} must be at most {MAX_AMOUNT:,}")
+    return body
+
+
+def _rows(function, inputs, action):
+    # Rows a request produces, to refuse oversized responses and decide
+    # whether it runs in the pool
+    scenarios = np.broadcast(*[np.asarray(inputs[name]) for name in _required(function)]).size
+    if action == "schedule":
+        return scenarios * 12 * int(np.ceil(np.max(inputs["time"])))
+    return scenarios
+
+
+def _loop_months(name, inputs):
+    # Months the amortization loop runs for an EMI request (whatever the
+    # number of loans, each month costs a round of NumPy calls); 0 for the
+    # closed-form calculators
+    return int(np.rint(np.max(inputs["time"]) * 12)) if name == "emi" else 0
+
+
+class Service:
+    def __init__(self, workers=None, max_entries=None):
+        self.results = cache.ResultCache(max_entries or cache.max_entries_from_env(DEFAULT_MAX_ENTRIES))
+        self.pending = {}
+        self.coalesced = 0
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def health(self):
+        return _encode({
+            "status": "ok",
+            "cache_entries": len(self.results),
+            "cache_hits": self.results.hits,
+            "cache_misses": self.results.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.pending),
+        })
+
+    async def dispatch(self, method, path, body):
+        parts = path.strip("/").split("/")
+        if parts == ["health"]:
+            return self.health()
+        if len(parts) not in (2, 3) or parts[0] != "v1":
+            raise RequestError(404, f"no endpoint at {path}")
+        name, action = parts[1], parts[2] if len(parts) == 3 else None
+        if action == "schedule":
+            function, handler = SCHEDULES.get(name), build_schedule
+        elif action in (None, "batch"):
+            function, handler = CALCULATORS.get(name), price if action is None else price_batch
+        else:
+            function = None
+        if function is None:
+            raise RequestError(404, f"no endpoint at {path}")
+        if method != "POST":
+            raise RequestError(405, f"{path} only accepts POST")
+
+        try:
+            request = json.loads(body or b"null", parse_constant=_reject_constant)
+        except ValueError as error:
+            raise RequestError(400, f"invalid JSON: {error}")
+        inputs = _inputs(function, request, scalars=action is None)
+        if action is None:
+            key = cache.make_key(name, **inputs)
+        else:
+            key = (path, json.dumps(inputs, sort_keys=True))
+        try:
+            rows = _rows(function, inputs, action)
+        except (ValueError, TypeError) as error:
+            raise RequestError(400, f"invalid inputs: {error}")
+        if action is not None and rows > MAX_ROWS:
+            raise RequestError(413, f"the response would have {rows:,} rows; the limit is {MAX_ROWS:,}")
+        offload = (action is not None and rows > INLINE_LIMIT) or _loop_months(name, inputs) > INLINE_MONTHS
+        return await self.respond(key, handler, name, inputs, offload)
+
+    async def respond(self, key, handler, name, inputs, offload):
+        response = self.results.peek(key, "response")
+        if response is not None:
+            return response
+        # Coalesce: identical requests already in flight await the same task
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key, handler, name, inputs, offload))
+            self.pending[key] = task
+            task.add_done_callback(lambda _: self.pending.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _compute(self, key, handler, name, inputs, offload):
+        try:
+            if offload:
+                response = await asyncio.get_running_loop().run_in_executor(self.pool, handler, name, inputs)
+            else:
+                response = handler(name, inputs)
+        except (ValueError, TypeError) as error:
+            raise RequestError(400, str(error))
+        self.results.put(key, "response", response)
+        return response
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    header, _, value = line.decode("latin-1").partition(":")
+                    headers[header.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY:
+                        raise RequestError(413, f"request body is larger than {MAX_BODY} bytes")
+                except ValueError:
+                    await self._send(writer, 400, _encode({"error": "malformed request"}), keep_alive=False)
+                    break
+                except RequestError as error:
+                    await self._send(writer, error.status, _encode({"error": str(error)}), keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, response = 200, await self.dispatch(method, target.split("?", 1)[0], body)
+                except RequestError as error:
+                    status, response = error.status, _encode({"error": str(error)})
+                except Exception as error:
+                    status, response = 500, _encode({"error": f"{type(error).__name__}: {error}"})
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                await self._send(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _send(writer, status, body, keep_alive):
+        head = (
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8000, workers=None, max_entries=None, reuse_port=False):
+    service = Service(workers, max_entries)
+    server = await asyncio.start_server(service.handle, host, port, reuse_port=reuse_port or None)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def _run(host, port, workers, max_entries, reuse_port):
+    try:
+        asyncio.run(serve(host, port, workers, max_entries, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the calculators as a JSON HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for batches and schedules (default: all cores)")
+    parser.add_argument("--cache-size", type=int, default=None, help=f"cached responses (default: CALCULATOR_CACHE_SIZE or {DEFAULT_MAX_ENTRIES})")
+    parser.add_argument("--processes", type=int, default=1, help="server processes sharing the port, each with its own cache (Linux)")
+    args = parser.parse_args(argv)
+
+    print(f"serving on http://{args.host}:{args.port} with {args.processes} process(es)")
+    if args.processes == 1:
+        _run(args.host, args.port, args.workers, args.cache_size, False)
+        return
+    workers = args.workers or max(1, (os.cpu_count() or 1) // args.processes)
+    processes = [
+        multiprocessing.Process(target=_run, args=(args.host, args.port, workers, args.cache_size, True))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
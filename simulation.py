@@ -0,0 +1,171 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import engine
+
+# Monte Carlo return simulation for SIP, step-up SIP and SWP.
+#
+# Instead of one fixed rate, every path draws its own sequence of monthly
+# returns and the plan is evaluated month by month on that sequence:
+#
+#   balance[t] = (balance[t-1] + contribution[t]) * growth[t] - withdrawal[t]
+#
+# Contributions are made at the start of a month and withdrawals at the end.
+# With zero volatility this reproduces engine.sip exactly. Step-up SIP
+# compounds earlier years' instalments through to maturity, and SWP
+# withdraws from month one while the balance keeps earning; both are what
+# sequence-of-returns risk is about, and both differ from the fixed-rate
+# calculators, which grow each year's block (step-up) or the whole
+# principal (SWP) separately.
+#
+# Every block of SEED_BLOCK paths draws from its own child seed, and paths
+# are processed in chunks of whole blocks (`chunk_size` is rounded up to a
+# multiple of SEED_BLOCK). Memory is bounded by one chunk, and results
+# depend only on `seed`, not on `chunk_size` or on how many processes
+# evaluate the chunks.
+
+MODELS = ("normal", "lognormal", "bootstrap")
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+SEED_BLOCK = 1000
+
+
+# Growth factors, one row per month and one column per path
+def _growth(rng, model, paths, months, rate, volatility, returns):
+    mean = engine._monthly_rate(rate)
+    sigma = volatility / 100 / np.sqrt(12)
+    if model == "normal":
+        # A month can lose everything but no more
+        monthly = rng.normal(mean, sigma, size=(months, paths))
+        return 1 + np.maximum(monthly, -1)
+    if model == "lognormal":
+        # Log-returns centred so that E[growth] equals the fixed-rate growth
+        mu = np.log1p(mean) - sigma ** 2 / 2
+        return np.exp(rng.normal(mu, sigma, size=(months, paths)))
+    if model == "bootstrap":
+        return 1 + rng.choice(returns, size=(months, paths))
+    raise ValueError(f"Unknown return model: {model}")
+
+
+def _balances(growth, initial, contributions, withdrawals, checkpoints):
+    # Runs the recurrence forward over all paths at once and keeps the
+    # balances at the checkpoint months. Growth can be exactly 0, so there
+    # is no closed form through the cumulative growth to divide by.
+    months, paths = growth.shape
+    balance = np.full(paths, initial)
+    kept = np.empty((paths, checkpoints.size))
+    drawn = withdrawals.any()
+    column = 0
+    for month in range(months):
+        balance += contributions[month]
+        balance *= growth[month]
+        if drawn:
+            # A depleted path stays at zero
+            balance -= withdrawals[month]
+            np.maximum(balance, 0, out=balance)
+        if month + 1 == checkpoints[column]:
+            kept[:, column] = balance
+            column += 1
+    return kept
+
+
+def _run_chunk(task):
+    seeds, sizes, plan, options = task
+    growth = np.concatenate([
+        _growth(np.random.default_rng(seed), options["model"], size, plan["months"],
+                options["rate"], options["volatility"], options["returns"])
+        for seed, size in zip(seeds, sizes)
+    ], axis=1)
+    checkpoints = _balances(growth, plan["initial"], plan["contributions"], plan["withdrawals"], plan["checkpoints"])
+    depleted = checkpoints[:, -1] <= 0 if plan["withdrawals"].any() else np.zeros(len(checkpoints), dtype=bool)
+    return checkpoints, depleted
+
+
+def _simulate(plan, rate, volatility=15.0, model="lognormal", returns=None, paths=10000, seed=None,
+              chunk_size=10000, workers=None, percentiles=DEFAULT_PERCENTILES):
+    if model not in MODELS:
+        raise ValueError(f"Unknown return model: {model}")
+    if not np.isfinite(volatility) or volatility < 0:
+        raise ValueError("volatility must be a finite, non-negative percentage")
+    for name, value in (("paths", paths), ("chunk_size", chunk_size)):
+        if isinstance(value, bool) or not isinstance(value, (int, np.integer)) or value < 1:
+            raise ValueError(f"{name} must be a positive integer")
+    if model == "bootstrap":
+        if returns is None or len(returns) == 0:
+            raise ValueError("bootstrap needs a series of monthly returns")
+        returns = np.asarray(returns, dtype=np.float64)
+        if (returns <= -1).any():
+            raise ValueError("monthly returns must be greater than -100%")
+    options = {"model": model, "rate": rate, "volatility": volatility, "returns": returns}
+
+    sizes = [min(SEED_BLOCK, paths - start) for start in range(0, paths, SEED_BLOCK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    blocks = -(-chunk_size // SEED_BLOCK)
+    tasks = [
+        (seeds[start:start + blocks], sizes[start:start + blocks], plan, options)
+        for start in range(0, len(sizes), blocks)
+    ]
+    if workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            chunks = list(pool.map(_run_chunk, tasks))
+    else:
+        chunks = [_run_chunk(task) for task in tasks]
+
+    checkpoints = np.concatenate([chunk[0] for chunk in chunks])
+    depleted = np.concatenate([chunk[1] for chunk in chunks])
+    fan = np.percentile(checkpoints, percentiles, axis=0)
+    return {
+        "months": plan["checkpoints"],
+        "percentiles": np.asarray(percentiles),
+        "fan": fan,
+        "maturity": fan[:, -1],
+        "mean": checkpoints[:, -1].mean(),
+        "investment": plan["contributions"].sum() + plan["initial"],
+        "withdrawals": plan["withdrawals"].sum(),
+        "depletion_probability": depleted.mean(),
+    }
+
+
+def _plan(months, initial=0.0, contributions=None, withdrawals=None, fan_every=12):
+    # Balances are kept at every `fan_every`-th month and at maturity only,
+    # which bounds the memory of the fan regardless of path count.
+    checkpoints = np.arange(fan_every, months + 1, fan_every)
+    if checkpoints.size == 0 or checkpoints[-1] != months:
+        checkpoints = np.append(checkpoints, months)
+    return {
+        "months": months,
+        "initial": float(initial),
+        "contributions": np.zeros(months) if contributions is None else contributions,
+        "withdrawals": np.zeros(months) if withdrawals is None else withdrawals,
+        "checkpoints": checkpoints,
+    }
+
+
+# SIP
+def simulate_sip(principal, rate, time, fan_every=12, **options):
+    months = int(time) * 12
+    plan = _plan(months, contributions=np.full(months, float(principal)), fan_every=fan_every)
+    return _simulate(plan, rate, **options)
+
+
+# Step-up SIP
+def simulate_stepup_sip(principal, increment, rate, time, fan_every=12, **options):
+    months = int(time) * 12
+    contributions = principal + increment * (np.arange(months) // 12)
+    plan = _plan(months, contributions=contributions.astype(np.float64), fan_every=fan_every)
+    return _simulate(plan, rate, **options)
+
+
+# SWP
+def simulate_swp(principal, rate, time, monthly_withdrawal, fan_every=12, **options):
+    months = int(time) * 12
+    plan = _plan(months, initial=principal, withdrawals=np.full(months, float(monthly_withdrawal)), fan_every=fan_every)
+    return _simulate(plan, rate, **options)
+
+
+SIMULATIONS = {
+    "sip": simulate_sip,
+    "stepup_sip": simulate_stepup_sip,
+    "swp": simulate_swp,
+}
+
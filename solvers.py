@@ -0,0 +1,187 @@
+import numpy as np
+
+import engine
+
+# Batch inverse solvers.
+#
+# Each solver answers the reverse question of a calculator for arrays of
+# scenarios at once: which rate, how many months, what increment. Inputs
+# broadcast like the engine's (annual rate in %, tenure in years, amounts
+# in ₹). Where a closed form exists it is used directly; rates are found
+# with a vectorized bracketed Newton iteration that falls back to
+# bisection whenever a Newton step would leave the bracket.
+#
+# Scenarios without a solution (a goal below what a 0% return already
+# reaches, an EMI that never repays the loan, cashflows that are all of one
+# sign, ...) come back as NaN instead of raising, so one bad row does not
+# sink a batch of 100k.
+
+MAX_RATE = 100.0  # annual %, upper end of the rate bracket
+
+
+def _bracketed_newton(f, lo, hi, scale, xtol=1e-10, rtol=1e-12, max_iter=100):
+    # Finds x in [lo, hi] with f(x) = 0 for every element, stopping once
+    # |f(x)| <= rtol * scale or the bracket is narrower than xtol. f must be
+    # vectorized and is evaluated on the whole batch each iteration.
+    # Returns NaN where [lo, hi] does not bracket a root or the iteration
+    # has not converged within max_iter.
+    lo, hi = np.broadcast_arrays(np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64))
+    lo, hi = lo.copy(), hi.copy()
+    f_lo, f_hi = f(lo), f(hi)
+    exact_lo, exact_hi = f_lo == 0, f_hi == 0
+    solvable = (np.sign(f_lo) != np.sign(f_hi)) | exact_lo | exact_hi
+
+    x = np.where(exact_lo, lo, np.where(exact_hi, hi, (lo + hi) / 2))
+    done = ~solvable | exact_lo | exact_hi
+    for _ in range(max_iter):
+        if done.all():
+            break
+        f_x = f(x)
+        done |= (np.abs(f_x) <= rtol * scale) | (hi - lo <= xtol)
+
+        # Keep the root bracketed
+        same_side = np.sign(f_x) == np.sign(f_lo)
+        lo = np.where(same_side, x, lo)
+        f_lo = np.where(same_side, f_x, f_lo)
+        hi = np.where(same_side, hi, x)
+
+        step = 1e-7 * np.maximum(1, np.abs(x))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = (f(x + step) - f_x) / step
+            newton = x - f_x / slope
+        inside = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        x = np.where(done, x, np.where(inside, newton, (lo + hi) / 2))
+
+    return np.where(solvable & done, x, np.nan)
+
+
+def _growth(rate, months):
+    return np.power(1 + engine._monthly_rate(rate), months)
+
+
+def _sip_maturity(principal, rate, months):
+    monthly_rate = engine._monthly_rate(rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = (_growth(rate, months) - 1) / monthly_rate * (1 + monthly_rate)
+    return principal * np.where(monthly_rate == 0, months, factor)
+
+
+def _emi(loan_amount, rate, months):
+    monthly_rate = engine._monthly_rate(rate)
+    growth = _growth(rate, months)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = loan_amount * monthly_rate * growth / (growth - 1)
+    return np.where(monthly_rate == 0, loan_amount / months, payment)
+
+
+def _months_to_reach(ratio, rate):
+    # Solves (1 + r) ** n = ratio for n. Over hundreds of months the result
+    # carries float error near 1e-9, so callers round it to 6 decimals
+    # before taking whole months.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.log(ratio) / np.log1p(engine._monthly_rate(rate))
+
+
+# SIP: annual rate that grows the monthly investment to the goal
+def sip_rate(principal, goal_amount, time, **tolerances):
+    principal, goal_amount, time = engine._broadcast(principal, goal_amount, time)
+    months = time * 12
+    return _bracketed_newton(
+        lambda rate: _sip_maturity(principal, rate, months) - goal_amount,
+        0.0, MAX_RATE, goal_amount, **tolerances
+    )
+
+
+# SIP: months of investing needed to reach the goal
+def sip_tenure(principal, goal_amount, rate):
+    principal, goal_amount, rate = engine._broadcast(principal, goal_amount, rate)
+    monthly_rate = engine._monthly_rate(rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # From P * ((1 + r) ** n - 1) / r * (1 + r) = goal
+        months = _months_to_reach(1 + goal_amount * monthly_rate / (principal * (1 + monthly_rate)), rate)
+        months = np.where(monthly_rate == 0, goal_amount / principal, months)
+    months = np.ceil(np.round(months, 6))
+    return np.where((principal > 0) & (goal_amount > 0) & np.isfinite(months), months, np.nan)
+
+
+# Step-up SIP: annual increment that reaches the goal. engine.stepup_sip is
+# linear in the increment, so this is exact without iteration.
+def stepup_increment(principal, goal_amount, rate, time):
+    principal, goal_amount, rate, time = engine._broadcast(principal, goal_amount, rate, time)
+    yearly_factor = _sip_maturity(1.0, rate, 12)
+    step_years = time * (time - 1) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        increment = (goal_amount / yearly_factor - principal * time) / step_years
+    # A goal the flat SIP reaches exactly comes out a rounding error either
+    # side of zero
+    increment = np.where(np.abs(increment) < 1e-6, 0.0, increment)
+    # A one-year plan never steps up, and a negative increment means the
+    # flat SIP already overshoots the goal.
+    return np.where((step_years > 0) & (increment >= 0), increment, np.nan)
+
+
+# SWP: full monthly withdrawals a corpus supports while it keeps earning
+# the given rate. Withdrawals that never exceed the monthly return last
+# forever (inf).
+def swp_duration(principal, rate, monthly_withdrawal):
+    principal, rate, monthly_withdrawal = engine._broadcast(principal, rate, monthly_withdrawal)
+    monthly_rate = engine._monthly_rate(rate)
+    interest = principal * monthly_rate
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # From B * (1 + r) ** n - W * ((1 + r) ** n - 1) / r = 0
+        months = _months_to_reach(monthly_withdrawal / (monthly_withdrawal - interest), rate)
+        months = np.where(monthly_rate == 0, principal / monthly_withdrawal, months)
+    months = np.floor(np.round(months, 6))
+    months = np.where(monthly_withdrawal <= interest, np.inf, months)
+    return np.where((principal > 0) & (monthly_withdrawal > 0), months, np.nan)
+
+
+# EMI: annual rate implied by a loan, its EMI and tenure
+def emi_rate(loan_amount, emi, time, **tolerances):
+    loan_amount, emi, time = engine._broadcast(loan_amount, emi, time)
+    months = time * 12
+    return _bracketed_newton(
+        lambda rate: _emi(loan_amount, rate, months) - emi,
+        0.0, MAX_RATE, emi, **tolerances
+    )
+
+
+# EMI: months needed to repay a loan at a given EMI
+def emi_tenure(loan_amount, rate, emi):
+    loan_amount, rate, emi = engine._broadcast(loan_amount, rate, emi)
+    interest = loan_amount * engine._monthly_rate(rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # From L * (1 + r) ** n = EMI * ((1 + r) ** n - 1) / r
+        months = _months_to_reach(emi / (emi - interest), rate)
+        months = np.where(interest == 0, loan_amount / emi, months)
+    months = np.ceil(np.round(months, 6))
+    return np.where((emi > interest) & (loan_amount > 0), months, np.nan)
+
+
+# XIRR: annualized return (%) of dated cashflows, one scenario per row.
+# `cashflows` is 2-D (scenarios x flows) with NaN padding for scenarios with
+# fewer flows; `dates` is datetime64 or day numbers of the same shape, or a
+# 1-D array shared by all scenarios. Investments are negative, receipts
+# positive.
+def xirr(cashflows, dates, **tolerances):
+    cashflows = np.atleast_2d(np.asarray(cashflows, dtype=np.float64))
+    dates = np.asarray(dates)
+    if np.issubdtype(dates.dtype, np.datetime64):
+        dates = dates.astype("datetime64[D]").astype(np.float64)
+    dates = np.broadcast_to(np.atleast_2d(dates.astype(np.float64)), cashflows.shape)
+
+    present = ~np.isnan(cashflows)
+    amounts = np.where(present, cashflows, 0)
+    first = np.nanmin(np.where(present, dates, np.nan), axis=1, keepdims=True)
+    years = np.where(present, dates - first, 0) / 365
+
+    def npv(rate):
+        return (amounts / np.power(1 + rate[:, None] / 100, years)).sum(axis=1)
+
+    # Returns between -99.99% and 10,000% a year
+    rate = _bracketed_newton(
+        npv, np.full(len(amounts), -99.99), np.full(len(amounts), 100 * MAX_RATE),
+        np.abs(amounts).sum(axis=1), **tolerances
+    )
+    mixed = (amounts > 0).any(axis=1) & (amounts < 0).any(axis=1)
+    return np.where(mixed, rate, np.nan)
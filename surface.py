@@ -0,0 +1,189 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import struct
+
+import numpy as np
+
+import engine
+
+# Precomputed result surface for the slider calculators.
+#
+# The SIP, SWP, FD and goal-based SIP sliders have fixed steps, so their
+# input space is a small finite grid. `python surface.py build` evaluates
+# the engine over the whole grid once and writes one compact binary file:
+#
+#   b"CALCSURF" | header length (uint32) | JSON header | padded int32 arrays
+#
+# Loading maps the arrays with np.memmap, so every server worker shares the
+# same pages through the OS cache and a slider change becomes an index
+# lookup. The header records a version hash of the engine source and the
+# grids; a table built from other formulas or sliders is ignored and the
+# app falls back to live computation, as it always does for the EMI
+# calculator's unbounded number inputs.
+#
+# SWP maturity does not depend on the withdrawal, so only maturity is
+# stored and the remaining balance is derived on lookup.
+
+MAGIC = b"CALCSURF"
+ALIGNMENT = 64
+DEFAULT_PATH = os.environ.get("CALCULATOR_SURFACE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "surface.bin"))
+
+# (start, stop, step) of every slider, in engine argument order
+RATE = (1.0, 15.0, 0.1)
+GRIDS = {
+    "sip": {"principal": (500, 50000, 500), "rate": RATE, "time": (1, 30, 1)},
+    "swp": {"principal": (10000, 5000000, 5000), "rate": RATE, "time": (1, 30, 1)},
+    "goal_based_sip": {"goal_amount": (10000, 10000000, 5000), "rate": RATE, "time": (1, 30, 1)},
+    "fd": {"principal": (10000, 5000000, 5000), "rate": RATE, "time": (1, 10, 1)},
+}
+# The engine field each table stores
+FIELDS = {"sip": "maturity", "swp": "maturity", "goal_based_sip": "sip", "fd": "maturity"}
+
+
+def version():
+    digest = hashlib.sha256(inspect.getsource(engine).encode("utf-8"))
+    digest.update(json.dumps(GRIDS, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def axis_values(start, stop, step):
+    count = int(round((stop - start) / step)) + 1
+    return np.round(start + np.arange(count) * step, 6)
+
+
+def _axes(calculator):
+    return [axis_values(*bounds) for bounds in GRIDS[calculator].values()]
+
+
+def _evaluate(calculator):
+    axes = _axes(calculator)
+    inputs = list(np.meshgrid(*axes, indexing="ij", sparse=True))
+    if calculator == "swp":
+        inputs.append(0)
+    values = engine.CALCULATORS[calculator](*inputs)[FIELDS[calculator]]
+    if values.min() < np.iinfo(np.int32).min or values.max() > np.iinfo(np.int32).max:
+        raise OverflowError(f"{calculator} results do not fit in int32")
+    return values.astype(np.int32)
+
+
+def build(path=DEFAULT_PATH):
+    arrays = {calculator: _evaluate(calculator) for calculator in GRIDS}
+
+    header = {"version": version(), "grids": GRIDS, "arrays": {}}
+    offset = 0
+    for calculator, values in arrays.items():
+        header["arrays"][calculator] = {"offset": offset, "shape": values.shape, "dtype": values.dtype.str}
+        offset += -(-values.nbytes // ALIGNMENT) * ALIGNMENT
+    encoded = json.dumps(header).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 4 + len(encoded)) // ALIGNMENT) * ALIGNMENT
+
+    # Write next to the target and rename, so running servers never map a
+    # half-written file.
+    partial = path + ".partial"
+    with open(partial, "wb") as handle:
+        handle.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+        for calculator, values in arrays.items():
+            handle.seek(data_start + header["arrays"][calculator]["offset"])
+            handle.write(values.tobytes())
+        handle.truncate(data_start + offset)
+    os.replace(partial, path)
+    return path
+
+
+class Surface:
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, "rb") as handle:
+            if handle.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a result surface file")
+            (length,) = struct.unpack("<I", handle.read(4))
+            header = json.loads(handle.read(length))
+        if header["version"] != version() or header["grids"] != json.loads(json.dumps(GRIDS)):
+            raise ValueError(f"{path} was built from different formulas or sliders; rebuild it")
+
+        data_start = -(-(len(MAGIC) + 4 + length) // ALIGNMENT) * ALIGNMENT
+        self.path = path
+        self.arrays = {
+            calculator: np.memmap(
+                path, dtype=layout["dtype"], mode="r",
+                offset=data_start + layout["offset"], shape=tuple(layout["shape"])
+            )
+            for calculator, layout in header["arrays"].items()
+        }
+
+    def index(self, calculator, **inputs):
+        # Grid position of the inputs, or None if any value is off the grid
+        position = []
+        for name, (start, stop, step) in GRIDS[calculator].items():
+            value = inputs[name]
+            i = int(round((value - start) / step))
+            if not 0 <= i <= int(round((stop - start) / step)) or abs(start + i * step - value) > 1e-6:
+                return None
+            position.append(i)
+        return tuple(position)
+
+    def lookup(self, calculator, **inputs):
+        # Same result dict as engine.as_scalars(...), or None when the table
+        # does not cover the calculator or inputs.
+        if calculator not in self.arrays:
+            return None
+        position = self.index(calculator, **inputs)
+        if position is None:
+            return None
+        value = int(self.arrays[calculator][position])
+
+        if calculator == "goal_based_sip":
+            investment = value * inputs["time"] * 12
+            return {"sip": value, "maturity": inputs["goal_amount"], "investment": investment,
+                    "earnings": inputs["goal_amount"] - investment}
+        investment = inputs["principal"] * inputs["time"] * 12 if calculator == "sip" else inputs["principal"]
+        result = {"maturity": value, "investment": investment, "earnings": value - investment}
+        if calculator == "swp":
+            result["balance"] = engine._swp_balance(value, inputs["time"] * 12, inputs["monthly_withdrawal"]).item()
+        return result
+
+    def rate_tenure(self, calculator, amount):
+        # Rate x tenure slice of the table at a fixed amount slider value,
+        # with the matching axis values; None if the amount is off the grid.
+        amount_name = next(iter(GRIDS[calculator]))
+        rates, times = _axes(calculator)[1:]
+        position = self.index(calculator, **{amount_name: amount, "rate": rates[0], "time": times[0]})
+        if position is None:
+            return None
+        return rates, times, np.asarray(self.arrays[calculator][position[0]])
+
+
+def load(path=DEFAULT_PATH):
+    # Surface for the app, or None when no usable table has been built
+    if not os.path.exists(path):
+        return None
+    try:
+        return Surface(path)
+    except (ValueError, struct.error):
+        # Not a table, a truncated one or a stale one
+        return None
+
+
+# Live rate x tenure grid, used when no table is available
+def live_rate_tenure(calculator, amount):
+    rates, times = _axes(calculator)[1:]
+    inputs = [amount, rates[:, None], times[None, :]]
+    if calculator == "swp":
+        inputs.append(0)
+    return rates, times, engine.CALCULATORS[calculator](*inputs)[FIELDS[calculator]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the precomputed result surface for the slider calculators.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--output", default=DEFAULT_PATH, help=f"table file (default: {DEFAULT_PATH})")
+    args = parser.parse_args(argv)
+
+    path = build(args.output)
+    print(f"wrote {path} ({os.path.getsize(path) / 2**20:.1f} MiB, version {version()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import amortization
+import engine
+
+
+def loan_book(count, seed):
+    rng = np.random.default_rng(seed)
+    inputs = {
+        "loan_amount": rng.integers(2, 2000, count) * 5000,
+        "rate": rng.integers(1, 200, count) / 10,
+        "time": rng.integers(1, 30, count),
+    }
+    events = {
+        "prepayments": {"loan": rng.integers(0, count, 100), "month": rng.integers(1, 120, 100), "amount": rng.integers(1, 50, 100) * 1000},
+        "rate_resets": {"loan": rng.integers(0, count, 50), "month": rng.integers(1, 120, 50), "rate": rng.integers(1, 200, 50) / 10},
+    }
+    return inputs, events
+
+
+@pytest.mark.parametrize("prepayment_mode", amortization.PREPAYMENT_MODES)
+def test_totals_match_the_summarized_schedule(prepayment_mode):
+    inputs, events = loan_book(500, seed=0)
+    options = dict(events, prepayment_mode=prepayment_mode, interest_rounding="half_up", emi_rounding="ceiling", emi_unit=1000)
+    expected = amortization.summarize(amortization.amortize(**inputs, **options), loans=500)
+    actual = amortization.totals(**inputs, **options)
+    assert {name: column.tolist() for name, column in actual.items()} == {name: column.tolist() for name, column in expected.items()}
+
+
+def test_emi_totals_reconcile_with_the_schedule():
+    # The calculator's example loan: EMI x months is ₹7,43,880, the schedule
+    # adds up to ₹7,43,933.49
+    result = engine.as_scalars(amortization.emi(500000, 8.5, 10))
+    assert result == {"emi_paise": 619900, "total_payment_paise": 74393349, "total_interest_paise": 24393349, "months": 120}
+    assert engine.as_scalars(engine.emi(500000, 8.5, 10))["nominal_total_payment"] == 743880
+
+
+def test_emi_matches_engine_emi():
+    inputs, _ = loan_book(2000, seed=1)
+    assert np.array_equal(amortization.emi(**inputs)["emi_paise"], engine.emi(**inputs)["emi"] * 100)
+
+
+def test_rate_reset_keeps_the_tenure_a_prepayment_shortened():
+    # ₹10L at 8% over 20 years with ₹3L prepaid in month 12 ends after 130
+    # months; a reset to the same rate must not stretch it back to 240
+    prepayments = {"loan": [0], "month": [12], "amount": [300000]}
+    assert amortization.totals(1000000, 8.0, 20, prepayments=prepayments)["months"].tolist() == [130]
+    reset = {"loan": [0], "month": [24], "rate": [8.0]}
+    assert amortization.totals(1000000, 8.0, 20, prepayments=prepayments, rate_resets=reset)["months"].tolist() == [130]
+    # Without a prepayment the reset still spreads over the original tenure
+    assert amortization.totals(1000000, 8.0, 20, rate_resets=reset)["months"].tolist() == [240]
+
+
+@pytest.mark.parametrize("inputs", [
+    {"loan_amount": 1e15, "rate": 30.0, "time": 30},
+    {"loan_amount": 1e17, "rate": 8.0, "time": 10},
+    {"loan_amount": 1e12, "rate": 8.0, "time": 10, "rate_resets": {"loan": [0], "month": [2], "rate": [1e9]}},
+])
+def test_amounts_too_large_for_int64_paise_are_rejected(inputs):
+    with pytest.raises(ValueError, match="int64 paise"):
+        amortization.totals(**inputs)
+
+
+@pytest.mark.parametrize("options, message", [
+    ({"emi_unit": 0}, "emi_unit"),
+    ({"emi_unit": 2.5}, "emi_unit"),
+    ({"prepayments": {"loan": [0], "month": [3], "amount": [-1000]}}, "not negative"),
+    ({"prepayments": {"loan": [0], "month": [0], "amount": [1000]}}, "months start at 1"),
+    ({"rate_resets": {"loan": [0], "month": [3]}}, "loan, month and rate"),
+])
+def test_invalid_options_are_rejected(options, message):
+    with pytest.raises(ValueError, match=message):
+        amortization.amortize(500000, 8.0, 10, **options)
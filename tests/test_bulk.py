@@ -0,0 +1,45 @@
+import pandas as pd
+
+import bulk
+
+
+def scenarios():
+    return pd.DataFrame({
+        "client_id": [10, 11, 12, 13],
+        "calculator": ["fd", "fd", "emi", "swp"],
+        "principal": [100000, 200000, None, 500000],
+        "rate": [7.0, 7.0, 8.5, 8.0],
+        "time": [3, 5, 10, 10],
+        "loan_amount": [None, None, 500000, None],
+        "monthly_withdrawal": [None, None, None, 5000],
+    })
+
+
+def test_parts_share_one_schema(tmp_path):
+    scenarios().to_parquet(tmp_path / "in.parquet")
+    # The first chunk holds only FD rows and no schedules
+    bulk.run(str(tmp_path / "in.parquet"), str(tmp_path / "out"), chunk_size=2, workers=1,
+             id_column="client_id", with_schedules=True, progress=None)
+
+    results = pd.read_parquet(tmp_path / "out" / "results")
+    assert list(results.columns) == ["row", "client_id", "calculator", *bulk.RESULT_COLUMNS]
+    assert results["row"].tolist() == [0, 1, 2, 3]
+    assert results.loc[2, "emi_paise"] == 619900
+    assert results.loc[2, "total_payment_paise"] == 74393349
+    assert results.loc[[0, 1, 3], "emi_paise"].isna().all()
+    assert results.loc[0, "maturity"] == 122504
+
+    schedule = pd.read_parquet(tmp_path / "out" / "schedules")
+    assert list(schedule.columns) == ["row", "calculator", "month", *bulk.SCHEDULE_COLUMNS]
+    assert schedule.groupby("row").size().to_dict() == {2: 120, 3: 120}
+    assert schedule.loc[schedule["row"] == 3, "principal_paise"].isna().all()
+    emi = schedule[schedule["row"] == 2]
+    assert emi["payment_paise"].sum() == 74393349
+
+
+def test_schedules_stream_in_sub_chunks(monkeypatch):
+    monkeypatch.setattr(bulk, "SCHEDULE_SCENARIOS", 1)
+    df = pd.concat([scenarios()] * 2, ignore_index=True)
+    chunks = [frame for _, frame in bulk.schedule_chunks(df, 100)]
+    assert [frame["row"].iloc[0] for frame in chunks] == [102, 106, 103, 107]
+    assert all(len(frame) == 120 for frame in chunks)
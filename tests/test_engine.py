@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+import engine
+import surface
+
+# Parity of the vectorized engine with the scalar formulas the calculators
+# used inline before engine.py existed, over sampled slider values. Every
+# figure must match to the rupee, including results that land exactly on
+# .5 and so depend on the last bit of the power (see engine._power).
+
+SAMPLES = 5000
+
+
+# Original inline formulas, one scenario at a time
+def original_sip(principal, rate, time):
+    months = time * 12
+    monthly_rate = rate / 12 / 100
+    amount = round(principal * (((1 + monthly_rate) ** months - 1) / monthly_rate) * (1 + monthly_rate))
+    total_investment = principal * months
+    return {"maturity": amount, "investment": total_investment, "earnings": amount - total_investment}
+
+
+def original_stepup_sip(principal, increment, rate, time):
+    monthly_rate = rate / 12 / 100
+    total_investment = 0
+    total_amount = 0
+    for i in range(time):
+        yearly_investment = principal + (increment * i)
+        total_amount += yearly_investment * (((1 + monthly_rate) ** 12 - 1) / monthly_rate) * (1 + monthly_rate)
+        total_investment += yearly_investment * 12
+    total_amount = round(total_amount)
+    return {"maturity": total_amount, "investment": total_investment, "earnings": total_amount - total_investment}
+
+
+def original_swp(principal, rate, time, monthly_withdrawal):
+    months = time * 12
+    monthly_rate = rate / 12 / 100
+    maturity_amount = round(principal * (1 + monthly_rate) ** months)
+    remaining_amount = maturity_amount
+    for _ in range(months):
+        if remaining_amount > 0:
+            remaining_amount -= monthly_withdrawal
+        else:
+            remaining_amount = 0
+    return {
+        "maturity": maturity_amount,
+        "investment": principal,
+        "earnings": maturity_amount - principal,
+        "balance": remaining_amount,
+    }
+
+
+def original_goal_based_sip(goal_amount, rate, time):
+    months = time * 12
+    monthly_rate = rate / 12 / 100
+    required_sip = round(goal_amount / (((1 + monthly_rate) ** months - 1) / monthly_rate) * (1 + monthly_rate))
+    investment = required_sip * months
+    return {"sip": required_sip, "maturity": goal_amount, "investment": investment, "earnings": goal_amount - investment}
+
+
+def original_fd(principal, rate, time):
+    maturity_amount = round(principal * (1 + rate / 100) ** time)
+    return {"maturity": maturity_amount, "investment": principal, "earnings": maturity_amount - principal}
+
+
+def original_emi(loan_amount, rate, time):
+    monthly_interest_rate = (rate / 12) / 100
+    total_months = time * 12
+    emi = (loan_amount * monthly_interest_rate * (1 + monthly_interest_rate) ** total_months) / ((1 + monthly_interest_rate) ** total_months - 1)
+    emi = round(emi)
+    total_payment = emi * total_months
+    return {"emi": emi, "nominal_total_payment": total_payment, "nominal_total_interest": total_payment - loan_amount}
+
+
+ORIGINALS = {
+    "sip": original_sip,
+    "stepup_sip": original_stepup_sip,
+    "swp": original_swp,
+    "goal_based_sip": original_goal_based_sip,
+    "fd": original_fd,
+    "emi": original_emi,
+}
+
+# Slider (start, stop, step) per input; the EMI inputs are unbounded
+# number fields, sampled over a generous range
+SLIDERS = {
+    "sip": surface.GRIDS["sip"],
+    "stepup_sip": {"principal": (500, 50000, 500), "increment": (0, 10000, 100), "rate": surface.RATE, "time": (1, 30, 1)},
+    "swp": dict(surface.GRIDS["swp"], monthly_withdrawal=(500, 50000, 500)),
+    "goal_based_sip": surface.GRIDS["goal_based_sip"],
+    "fd": surface.GRIDS["fd"],
+    "emi": {"loan_amount": (10000, 10000000, 5000), "rate": (0.1, 30.0, 0.1), "time": (1, 40, 1)},
+}
+
+
+def sample(calculator, count, seed):
+    rng = np.random.default_rng(seed)
+    inputs = {}
+    for name, (start, stop, step) in SLIDERS[calculator].items():
+        values = rng.choice(surface.axis_values(start, stop, step), count)
+        # Integer sliders hand the formulas ints, float sliders floats
+        inputs[name] = values.astype(int).tolist() if isinstance(step, int) else values.tolist()
+    return inputs
+
+
+def assert_matches(calculator, inputs):
+    result = engine.CALCULATORS[calculator](**inputs)
+    count = len(next(iter(inputs.values())))
+    mismatches = []
+    for i in range(count):
+        scenario = {name: values[i] for name, values in inputs.items()}
+        expected = ORIGINALS[calculator](**scenario)
+        actual = {field: result[field][i].item() for field in expected}
+        if actual != expected:
+            mismatches.append((scenario, expected, actual))
+    assert not mismatches, f"{len(mismatches)} mismatches, first: {mismatches[0]}"
+
+
+@pytest.mark.parametrize("calculator", list(ORIGINALS))
+def test_engine_matches_original_formulas(calculator):
+    assert_matches(calculator, sample(calculator, SAMPLES, seed=sorted(ORIGINALS).index(calculator)))
+
+
+def test_fd_half_rupee_ties():
+    # Exact .5 results, including two where NumPy's vectorized power rounds
+    # the other way
+    ties = [(500000, 1.0, 3), (15000, 1.0, 2), (20000, 8.5, 2), (3840000, 7.5, 4), (4000000, 11.5, 3)]
+    assert_matches("fd", {
+        "principal": [principal for principal, _, _ in ties],
+        "rate": [rate for _, rate, _ in ties],
+        "time": [time for _, _, time in ties],
+    })
+
+
+def test_swp_balance_when_withdrawals_exhaust_the_corpus():
+    assert_matches("swp", {
+        "principal": [10000, 10000, 100000],
+        "rate": [1.0, 15.0, 6.0],
+        "time": [30, 1, 5],
+        "monthly_withdrawal": [50000, 500, 5000],
+    })
+
+
+@pytest.mark.parametrize("calculator", list(ORIGINALS))
+def test_empty_inputs(calculator):
+    result = engine.CALCULATORS[calculator](**{name: [] for name in SLIDERS[calculator]})
+    assert all(column.shape == (0,) for column in result.values())
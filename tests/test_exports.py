@@ -0,0 +1,43 @@
+import openpyxl
+import pandas as pd
+import pytest
+
+import exports
+
+
+def read_sheets(path):
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    return {sheet.title: [list(row) for row in sheet.iter_rows(values_only=True)] for sheet in workbook.worksheets}
+
+
+def test_xlsx_continues_on_a_new_sheet_at_the_row_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "SHEET_ROWS", 4)
+    chunks = [("EMI Schedules", pd.DataFrame({"month": [1, 2]})), ("EMI Schedules", pd.DataFrame({"month": [3, 4, 5, 6]}))]
+    exports.write_xlsx(chunks, tmp_path / "out.xlsx")
+
+    sheets = read_sheets(tmp_path / "out.xlsx")
+    assert list(sheets) == ["EMI Schedules", "EMI Schedules (2)"]
+    assert sheets["EMI Schedules"] == [["month"], [1], [2], [3]]
+    assert sheets["EMI Schedules (2)"] == [["month"], [4], [5], [6]]
+
+
+def test_xlsx_repeated_sheet_name_gets_a_suffix(tmp_path):
+    long_name = "A sheet name of exactly 31 char"
+    chunks = [
+        (long_name, pd.DataFrame({"a": [1]})),
+        ("Summary", pd.DataFrame({"b": []})),
+        (long_name.upper(), pd.DataFrame({"a": [2]})),
+    ]
+    exports.write_xlsx(chunks, tmp_path / "out.xlsx")
+
+    sheets = read_sheets(tmp_path / "out.xlsx")
+    assert list(sheets) == [long_name, "Summary", "A SHEET NAME OF EXACTLY 31 (2)"]
+    assert sheets["Summary"] == [["b"]]
+    assert sheets["A SHEET NAME OF EXACTLY 31 (2)"] == [["a"], [2]]
+
+
+def test_xlsx_raises_when_a_row_cannot_be_written(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "SHEET_ROWS", 2**21)
+    chunks = [("Sheet", pd.DataFrame({"a": range(1048576)}))]
+    with pytest.raises(ValueError, match="row 1048577"):
+        exports.write_xlsx(chunks, tmp_path / "out.xlsx")
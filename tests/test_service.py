@@ -0,0 +1,89 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import service
+
+
+@pytest.fixture
+def app():
+    app = service.Service(workers=1)
+    yield app
+    app.close()
+
+
+def post(app, path, body):
+    try:
+        response = asyncio.run(app.dispatch("POST", path, body.encode() if isinstance(body, str) else json.dumps(body).encode()))
+    except service.RequestError as error:
+        return error.status, str(error)
+    return 200, json.loads(response)
+
+
+def test_emi_totals_and_schedule_are_paise(app):
+    status, result = post(app, "/v1/emi", {"loan_amount": 500000, "rate": 8.5, "time": 10})
+    assert status == 200
+    assert result == {"emi_paise": 619900, "total_payment_paise": 74393349, "total_interest_paise": 24393349, "months": 120}
+
+    status, schedule = post(app, "/v1/emi/schedule", {"loan_amount": 500000, "rate": 8.5, "time": 10})
+    assert status == 200
+    assert sorted(schedule) == ["balance_paise", "interest_paise", "month", "payment_paise", "prepayment_paise", "principal_paise", "scenario"]
+    assert sum(schedule["payment_paise"]) == result["total_payment_paise"]
+
+
+@pytest.mark.parametrize("path, body, message", [
+    ("/v1/emi", {"loan_amount": 500000, "rate": 8.5, "time": 0}, "time must be at least one month"),
+    ("/v1/emi/batch", {"loan_amount": [500000], "rate": 8.5, "time": [10, -1]}, "time must not be negative"),
+    ("/v1/sip", {"principal": 1000, "rate": 6.0, "time": 1000}, "at most 100 years"),
+    ("/v1/fd", {"principal": -1, "rate": 6.0, "time": 1}, "principal must not be negative"),
+    ("/v1/fd", '{"principal": NaN, "rate": 6.0, "time": 1}', "invalid JSON"),
+    ("/v1/fd/batch", {"principal": [1e400], "rate": 6.0, "time": 1}, "principal must be finite"),
+    ("/v1/fd/batch", {"principal": ["a"], "rate": 6.0, "time": 1}, "list of numbers"),
+    ("/v1/emi", {"loan_amount": 500000, "rate": 8.5, "time": 0.01}, "at least one month"),
+    ("/v1/emi", {"loan_amount": 1e15, "rate": 30.0, "time": 10}, "loan_amount must be at most"),
+    ("/v1/emi", {"loan_amount": 500000, "rate": 1000.0, "time": 10}, "rate must be at most"),
+    ("/v1/emi/schedule", {"loan_amount": 500000, "rate": 8.5, "time": 1, "emi_unit": 0}, "emi_unit"),
+    ("/v1/emi/schedule", {"loan_amount": 500000, "rate": 8.5, "time": 1, "prepayments": {"loan": [0], "month": [3], "amount": [-100000]}}, "not negative"),
+    ("/v1/emi/schedule", {"loan_amount": 500000, "rate": 8.5, "time": 1, "prepayments": {"loan": [0], "month": [0], "amount": [1000]}}, "months start at 1"),
+])
+def test_invalid_inputs_are_rejected(app, path, body, message):
+    status, error = post(app, path, body if isinstance(body, str) else json.dumps(body).replace("Infinity", "1e400"))
+    assert status == 400
+    assert message in error
+
+
+def test_oversized_responses_are_refused(app, monkeypatch):
+    monkeypatch.setattr(service, "MAX_ROWS", 1000)
+    assert post(app, "/v1/sip/schedule", {"principal": [1000] * 8, "rate": 6.0, "time": 10})[0] == 200
+    status, error = post(app, "/v1/sip/schedule", {"principal": [1000] * 9, "rate": 6.0, "time": 10})
+    assert status == 413 and "1,080 rows" in error
+    # Inputs broadcast against each other: 40 x 40 scenarios
+    status, _ = post(app, "/v1/fd/batch", {"principal": [[1000]] * 40, "rate": [6.0] * 40, "time": 1})
+    assert status == 413
+
+
+class RecordingPool(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.submitted = []
+
+    def submit(self, function, *args):
+        self.submitted.append(args[0])
+        return super().submit(function, *args)
+
+
+@pytest.mark.parametrize("path, body, offloaded", [
+    ("/v1/emi", {"loan_amount": 500000, "rate": 8.5, "time": 1}, False),
+    ("/v1/emi", {"loan_amount": 500000, "rate": 8.5, "time": 10}, True),
+    ("/v1/emi/batch", {"loan_amount": [500000] * 10, "rate": 8.5, "time": 30}, True),
+    ("/v1/emi/schedule", {"loan_amount": 500000, "rate": 8.5, "time": 10}, True),
+    ("/v1/sip", {"principal": 1000, "rate": 6.0, "time": 30}, False),
+    ("/v1/sip/batch", {"principal": [1000] * 10, "rate": 6.0, "time": 30}, False),
+])
+def test_emi_amortization_runs_in_the_pool(app, path, body, offloaded):
+    app.pool.shutdown()
+    app.pool = RecordingPool()
+    assert post(app, path, body)[0] == 200
+    assert bool(app.pool.submitted) == offloaded
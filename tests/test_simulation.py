@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import engine
+import simulation
+
+
+@pytest.mark.parametrize("options", [
+    {"chunk_size": 1000},
+    {"chunk_size": 2500},
+    {"chunk_size": 1000, "workers": 2},
+])
+def test_seed_reproduces_across_chunks_and_workers(options):
+    expected = simulation.simulate_swp(1000000, 8.0, 10, 9000, paths=5500, seed=7)
+    result = simulation.simulate_swp(1000000, 8.0, 10, 9000, paths=5500, seed=7, **options)
+    np.testing.assert_array_equal(result["fan"], expected["fan"])
+    assert result["depletion_probability"] == expected["depletion_probability"]
+
+
+@pytest.mark.parametrize("principal, rate, time", [(500, 1.0, 1), (1000, 12.0, 30), (25000, 7.3, 17), (50000, 15.0, 10)])
+def test_zero_volatility_matches_engine_sip(principal, rate, time):
+    expected = engine.as_scalars(engine.sip(principal, rate, time))["maturity"]
+    for model in ("normal", "lognormal"):
+        result = simulation.simulate_sip(principal, rate, time, model=model, volatility=0.0, paths=10, seed=0)
+        assert np.rint(result["maturity"]).tolist() == [expected] * 5
+
+
+def test_total_loss_months_keep_percentiles_finite():
+    # At 150% volatility the normal model draws months that lose everything
+    result = simulation.simulate_sip(1000, 8.0, 30, model="normal", volatility=150, paths=2000, seed=0)
+    assert np.isfinite(result["fan"]).all()
+    assert np.isfinite(result["mean"])
+
+    result = simulation.simulate_swp(100000, 8.0, 30, 100, model="normal", volatility=150, paths=2000, seed=0)
+    assert np.isfinite(result["fan"]).all()
+    assert result["depletion_probability"] > 0
+
+
+@pytest.mark.parametrize("options, message", [
+    ({"volatility": -1.0}, "volatility"),
+    ({"volatility": float("nan")}, "volatility"),
+    ({"paths": 0}, "paths"),
+    ({"paths": 10.5}, "paths"),
+    ({"chunk_size": 0}, "chunk_size"),
+    ({"model": "uniform"}, "Unknown return model"),
+    ({"model": "bootstrap"}, "bootstrap"),
+    ({"model": "bootstrap", "returns": [0.01, -1.0]}, "-100%"),
+])
+def test_invalid_options_are_rejected(options, message):
+    with pytest.raises(ValueError, match=message):
+        simulation.simulate_sip(1000, 8.0, 10, **options)
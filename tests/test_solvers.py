@@ -0,0 +1,96 @@
+import numpy as np
+
+import solvers
+
+# Forward formulas in ₹, unrounded, so an inverse solve can be checked
+# against the exact value that produced its input
+COUNT = 10000
+
+
+def monthly(rate):
+    return rate / 12 / 100
+
+
+def sip_maturity(principal, rate, months):
+    r = monthly(rate)
+    return principal * ((1 + r) ** months - 1) / r * (1 + r)
+
+
+def emi(loan_amount, rate, months):
+    r = monthly(rate)
+    growth = (1 + r) ** months
+    return loan_amount * r * growth / (growth - 1)
+
+
+def scenarios(seed):
+    rng = np.random.default_rng(seed)
+    return {
+        "amount": rng.integers(1, 1000, COUNT) * 1000.0,
+        "rate": rng.integers(1, 300, COUNT) / 10,
+        "years": rng.integers(1, 41, COUNT).astype(np.float64),
+    }
+
+
+def test_sip_rate_round_trip():
+    s = scenarios(0)
+    goal = sip_maturity(s["amount"], s["rate"], s["years"] * 12)
+    np.testing.assert_allclose(solvers.sip_rate(s["amount"], goal, s["years"]), s["rate"], atol=1e-6)
+
+
+def test_sip_tenure_round_trip():
+    s = scenarios(1)
+    months = s["years"] * 12
+    goal = sip_maturity(s["amount"], s["rate"], months)
+    np.testing.assert_array_equal(solvers.sip_tenure(s["amount"], goal, s["rate"]), months)
+    # A goal a tenth of an instalment higher takes one more month
+    np.testing.assert_array_equal(solvers.sip_tenure(s["amount"], goal + s["amount"] / 10, s["rate"]), months + 1)
+
+
+def test_stepup_increment_round_trip():
+    s = scenarios(2)
+    s["years"] = np.maximum(s["years"], 2)
+    increment = np.random.default_rng(3).integers(0, 100, COUNT) * 100.0
+    contributions = s["amount"] * s["years"] + increment * s["years"] * (s["years"] - 1) / 2
+    goal = contributions * sip_maturity(1.0, s["rate"], 12)
+    np.testing.assert_allclose(solvers.stepup_increment(s["amount"], goal, s["rate"], s["years"]), increment, atol=1e-6)
+
+
+def test_emi_rate_round_trip():
+    s = scenarios(4)
+    payment = emi(s["amount"], s["rate"], s["years"] * 12)
+    np.testing.assert_allclose(solvers.emi_rate(s["amount"], payment, s["years"]), s["rate"], atol=1e-6)
+
+
+def test_emi_tenure_round_trip():
+    s = scenarios(5)
+    months = s["years"] * 12
+    payment = emi(s["amount"], s["rate"], months)
+    np.testing.assert_array_equal(solvers.emi_tenure(s["amount"], s["rate"], payment), months)
+
+
+def test_xirr_known_returns():
+    days = np.array([0, 365])
+    assert np.isclose(solvers.xirr([[-1000, 1100]], days)[0], 10.0)
+
+    # Irregular dates and NaN padding: the solved rate zeroes the NPV
+    cashflows = np.array([[-1000, -500, 300, 1600], [-2000, 2300, np.nan, np.nan]])
+    dates = np.array([[0, 90, 200, 700], [0, 400, 0, 0]])
+    rate = solvers.xirr(cashflows, dates)
+    years = dates / 365
+    npv = np.nansum(cashflows / (1 + rate[:, None] / 100) ** years, axis=1)
+    np.testing.assert_allclose(npv, 0, atol=1e-6)
+    assert np.isclose(rate[1], (2300 / 2000) ** (365 / 400) * 100 - 100)
+
+
+def test_unsolvable_scenarios():
+    # A goal below what a 0% return already reaches
+    assert np.isnan(solvers.sip_rate(1000, 100000, 10)[()])
+    # An EMI at or below the first month's interest never repays the loan
+    assert np.isnan(solvers.emi_tenure(1000000, 12.0, [10000, 5000])).all()
+    # An EMI below the 0% instalment implies no rate in the bracket
+    assert np.isnan(solvers.emi_rate(1200000, 9000, 10)[()])
+    # Cashflows all of one sign have no return
+    assert np.isnan(solvers.xirr([[-1000, -500], [1000, 500]], [0, 365])).all()
+    # A withdrawal at or below the monthly interest lasts forever
+    assert np.isposinf(solvers.swp_duration(1200000, 12.0, [12000, 5000])).all()
+    assert solvers.swp_duration(1200000, 12.0, 12001)[()] > 0
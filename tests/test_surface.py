@@ -0,0 +1,75 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import engine
+import surface
+
+SMALL_GRIDS = {
+    "sip": {"principal": (500, 2000, 500), "rate": (1.0, 15.0, 0.7), "time": (1, 30, 7)},
+    "swp": {"principal": (10000, 30000, 5000), "rate": (1.0, 15.0, 0.7), "time": (1, 30, 7)},
+    "goal_based_sip": {"goal_amount": (10000, 30000, 5000), "rate": (1.0, 15.0, 0.7), "time": (1, 30, 7)},
+    "fd": {"principal": (10000, 30000, 5000), "rate": (1.0, 15.0, 0.7), "time": (1, 10, 3)},
+}
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    monkeypatch.setattr(surface, "GRIDS", SMALL_GRIDS)
+    path = str(tmp_path / "surface.bin")
+    surface.build(path)
+    return path
+
+
+def grid_points(calculator):
+    names = list(SMALL_GRIDS[calculator])
+    for values in itertools.product(*[surface.axis_values(*bounds).tolist() for bounds in SMALL_GRIDS[calculator].values()]):
+        yield dict(zip(names, values))
+
+
+@pytest.mark.parametrize("calculator", list(SMALL_GRIDS))
+def test_lookup_matches_engine(table, calculator):
+    table = surface.load(table)
+    for inputs in grid_points(calculator):
+        if calculator == "swp":
+            inputs["monthly_withdrawal"] = 500.0
+        assert table.lookup(calculator, **inputs) == engine.as_scalars(engine.CALCULATORS[calculator](**inputs)), inputs
+
+
+@pytest.mark.parametrize("calculator", list(SMALL_GRIDS))
+def test_rate_tenure_matches_engine(table, calculator):
+    table = surface.load(table)
+    for amount in surface.axis_values(*next(iter(SMALL_GRIDS[calculator].values()))).tolist():
+        rates, times, values = table.rate_tenure(calculator, amount)
+        live_rates, live_times, live = surface.live_rate_tenure(calculator, amount)
+        np.testing.assert_array_equal(rates, live_rates)
+        np.testing.assert_array_equal(times, live_times)
+        np.testing.assert_array_equal(values, live)
+
+
+def test_off_grid_inputs_miss(table):
+    table = surface.load(table)
+    assert table.lookup("sip", principal=750, rate=1.0, time=1) is None
+    assert table.lookup("sip", principal=500, rate=1.0, time=31) is None
+    assert table.lookup("emi", loan_amount=500000, rate=8.0, time=10) is None
+    assert table.rate_tenure("fd", 12345) is None
+
+
+def test_stale_or_foreign_files_are_ignored(table, tmp_path, monkeypatch):
+    assert surface.load(table) is not None
+    assert surface.load(str(tmp_path / "missing.bin")) is None
+
+    foreign = tmp_path / "foreign.bin"
+    foreign.write_bytes(b"not a surface file at all")
+    assert surface.load(str(foreign)) is None
+    with open(table, "rb") as handle:
+        foreign.write_bytes(handle.read(10))
+    assert surface.load(str(foreign)) is None
+
+    # Built from other sliders, or from other formulas
+    monkeypatch.setattr(surface, "GRIDS", dict(SMALL_GRIDS, fd={"principal": (10000, 35000, 5000), "rate": (1.0, 15.0, 0.7), "time": (1, 10, 3)}))
+    assert surface.load(table) is None
+    monkeypatch.setattr(surface, "GRIDS", SMALL_GRIDS)
+    monkeypatch.setattr(surface, "version", lambda: "0" * 16)
+    assert surface.load(table) is None